@@ -16,20 +16,65 @@
 #to generate libdoc documentation run:
 #   python -m robot.libdoc FtpLibrary FtpLibrary.html
 
+import calendar
+import datetime
+import errno
+import fnmatch
 import ftplib
+import hashlib
+import io
+import json
 import os
+import posixpath
+import random
+import re
 import socket
+import threading
+import time
+import zlib
 from robot.api import logger
 
+try:
+    import ssl
+except ImportError:
+    ssl = None
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+try:
+    from socketserver import ThreadingMixIn
+    from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+except ImportError:
+    from SocketServer import ThreadingMixIn
+    from SimpleXMLRPCServer import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+
+# socket errors caused by network or remote side, local file errors are not transient
+NETWORK_ERRNOS = set(getattr(errno, name) for name in ('ECONNRESET', 'ECONNREFUSED', 'ECONNABORTED', 'EPIPE',
+                                                      'ETIMEDOUT', 'ENETDOWN', 'ENETUNREACH', 'ENETRESET',
+                                                      'EHOSTDOWN', 'EHOSTUNREACH') if hasattr(errno, name))
+
 class FtpLibrary(object):
 
     """
 This library provides functionality of FTP client.
 
-Version 1.9 released on 27th of February 2020
+Version 1.11 (not released yet)
 
-What's new in release 1.9:
-- active mode added by Alexander Klose (scathaig)
+What's new in release 1.11:
+- Download Directory, Upload Directory, Sync Directory and Remove Directory Recursively keywords
+- Download Files Matching and Upload Files Matching keywords
+- resume, segmented download, checksum verification and configurable blocksize in Download File and Upload File
+- in-memory transfers: Upload Bytes, Download Bytes, Upload Text, Download Text
+- List Directory and Get File Info keywords with cached listings
+- background transfers: Start Download, Start Upload, Wait For Transfer
+- Transfer Between Connections keyword (server-to-server FXP with fallback to piping)
+- Wait For Remote File keyword
+- connection statistics, optional connection pool, retry policy and log policy
+- MODE Z compression, TLS session reuse and configurable SSL contexts
+- concurrent remote server mode
+- ftpLibraryBenchmark.py benchmark script
 
 FTP communication provided by ftplib.py
 
@@ -62,11 +107,24 @@ identified by string identifiers:
 
 To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
 (for example: python FtpLibrary.py 192.168.0.101 8222)
+
+Remote server shared by several Robot Framework runs can be started in concurrent
+mode: python FtpLibrary.py <ipaddress> <portnumber> concurrent
+Requests are then handled in parallel and every client gets its own library
+instance, identified by client address and URL path, so connection identifiers of
+different clients do not collide. Clients on one host should use different paths:
+ | Library | Remote | http://192.168.0.101:8222/pipeline1 |
+Files stay on the remote host: `Download File` and `Upload File` return dictionary
+with path, size and sha256 checksum of transferred file instead of server output.
+Library instances idle for an hour are closed.
 """
 
     ROBOT_LIBRARY_SCOPE = 'TEST SUITE'
+    ROBOT_LISTENER_API_VERSION = 2
 
-    def __init__(self, printOutput=True):
+    def __init__(self, printOutput=True, blocksize=65536, listingCacheTtl=30, statisticsFile=None,
+                 connectionPool=False, keepaliveInterval=60, retryAttempts=1, retryBackoff=1,
+                 retryCodes='421,425,426,450,451', logPolicy='full', logMaxLines=100, transferInfo=False):
         """
         During library import it is possible to disable logging of server messages.
         By default logging is enabled:
@@ -74,8 +132,53 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         To disable logging of server messages, additional parameter must be added to
         import:
         | Library | FtpLibrary.py | False |
+        Size of a block (in bytes) read or sent at once during file transfers can be
+        set during import as well. By default 65536:
+        | Library | FtpLibrary.py | blocksize=1048576 |
+        Directory listings returned by `List Directory` and `Get File Info` are cached
+        per connection for given number of seconds (0 disables caching). Cache is
+        cleared by keywords modifying server content on the same connection. By default 30:
+        | Library | FtpLibrary.py | listingCacheTtl=0 |
+        When statisticsFile is given, statistics of all connections (see `Get Ftp
+        Statistics`) are saved to that JSON file at the end of each suite, under
+        the suite long name:
+        | Library | FtpLibrary.py | statisticsFile=${OUTPUT DIR}/ftp_statistics.json |
+        With connectionPool enabled, `Ftp Close` (or end of suite) does not log out but
+        returns connection to a pool shared by all library instances in the process.
+        `Ftp Connect` with the same host, port, user, password, tls and mode then reuses
+        pooled connection after checking it with NOOP, instead of connecting and logging
+        in again. Pooled connections are kept alive with NOOP sent every
+        keepaliveInterval seconds and reopened when server closed them. By default False:
+        | Library | FtpLibrary.py | connectionPool=True | keepaliveInterval=30 |
+        Keywords can retry operations failed because of transient errors (see `Set Retry
+        Policy`). By default retrying is disabled (retryAttempts=1):
+        | Library | FtpLibrary.py | retryAttempts=4 | retryBackoff=0.5 | retryCodes=421,425,426 |
+        Amount of logged server output is controlled by log policy (see `Set Log Policy`).
+        By default whole output is logged (logPolicy=full):
+        | Library | FtpLibrary.py | logPolicy=truncate | logMaxLines=20 |
+        With transferInfo enabled, `Download File` and `Upload File` return dictionary with
+        'path' (local path of downloaded or remote path of uploaded file), 'size' and
+        'checksum' (sha256, unless other checksum is requested) instead of server output.
+        By default False:
+        | Library | FtpLibrary.py | transferInfo=True |
         """
         self.ftpList = {}
+        self.connSettings = {}
+        self.blocksize = int(blocksize)
+        self.listingCacheTtl = float(listingCacheTtl)
+        self.listingCache = {}
+        self.workingDirs = {}
+        self.ftpStatistics = {}
+        self.transfers = {}
+        self.transferCounter = 0
+        self.statisticsFile = statisticsFile
+        self.connectionPool = self.__isTrue(connectionPool)
+        self.keepaliveInterval = float(keepaliveInterval)
+        self.pooledConnections = {}
+        self.transferInfo = self.__isTrue(transferInfo)
+        self.set_retry_policy(retryAttempts, retryBackoff, retryCodes)
+        if statisticsFile or self.connectionPool:
+            self.ROBOT_LIBRARY_LISTENER = self
         if isinstance(printOutput, bool):
             self.printOutput = printOutput
         else:
@@ -83,6 +186,32 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
                 self.printOutput = False
             else:
                 self.printOutput = True
+        self.set_log_policy(logPolicy, logMaxLines)
+
+    def __log(self, output):
+        # logs server output (string or list of lines) according to log policy
+        if not self.printOutput:
+            return
+        if self.logPolicy in ('full', 'debug'):
+            if isinstance(output, list):
+                output = "\n".join(str(line) for line in output)
+            if self.logPolicy == 'debug':
+                logger.debug(output)
+            else:
+                logger.info(output)
+            return
+        if isinstance(output, list):
+            if self.logPolicy == 'summary':
+                logger.info("%d line(s)" % len(output))
+                return
+            lines = output
+        else:
+            lines = str(output).splitlines()
+        limit = 1 if self.logPolicy == 'summary' else self.logMaxLines
+        outputMsg = "\n".join(str(line) for line in lines[:limit])
+        if len(lines) > limit:
+            outputMsg += "\n... %d more line(s), %d in total" % (len(lines) - limit, len(lines))
+        logger.info(outputMsg)
 
     def __getConnection(self, connId):
         if connId in self.ftpList:
@@ -101,6 +230,610 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
     def __removeConnection(self, connId):
         if connId in self.ftpList:
             self.ftpList.pop(connId)
+        if connId in self.connSettings:
+            self.connSettings.pop(connId)
+        self.listingCache.pop(connId, None)
+        self.workingDirs.pop(connId, None)
+
+    def __createConnection(self, settings, statistics=None):
+        start = time.time()
+        if settings['tls']:
+            newFtp = _FtpTls(context=_sslContexts.get(settings.get('caFile'), settings.get('certFile'),
+                                                      settings.get('keyFile'), settings.get('tlsVersion')))
+        else:
+            newFtp = _Ftp()
+        newFtp.statistics = statistics
+        outputMsg = newFtp.connect(settings['host'], settings['port'], settings['timeout'])
+        try:
+            outputMsg += newFtp.login(settings['user'], settings['password'])
+        except ftplib.all_errors:
+            newFtp.close()
+            raise
+        # set mode depending of "mode" value. if it is not "active" or "passive" default to passive
+        newFtp.set_pasv({'passive': True, 'active': False}.get(settings['mode'], True))
+        if settings['tls'] and settings.get('secureData'):
+            try:
+                newFtp.prot_p()
+            except ftplib.all_errors:
+                newFtp.close()
+                raise
+        if settings.get('compression'):
+            try:
+                newFtp.voidcmd("MODE Z")
+                newFtp.compression = newFtp.modeZ = True
+            except ftplib.error_perm as e:
+                logger.info("Server refused MODE Z (%s), data is transferred uncompressed" % e)
+        if statistics is not None:
+            statistics.addConnection(time.time() - start)
+        return newFtp, outputMsg
+
+    def __cloneConnection(self, connId):
+        # opens an additional connection with the same settings as connId,
+        # used by keywords which spread work over several connections
+        thisConn = self.__getConnection(connId)
+        newFtp, outputMsg = self.__createConnection(self.connSettings[connId], self.ftpStatistics.get(connId))
+        if getattr(thisConn, '_prot_p', False) and not newFtp._prot_p:
+            newFtp.prot_p()
+        return newFtp
+
+    def __connectWorker(self, connId):
+        # clones connection connId, failed attempts are repeated according to retry policy
+        attempt = 1
+        while True:
+            try:
+                return self.__cloneConnection(connId)
+            except ftplib.all_errors as e:
+                if attempt >= self.retryAttempts or not self.__isRetryable(e):
+                    raise
+                time.sleep(self.__retryDelay(attempt))
+                attempt += 1
+
+    def __runInParallel(self, connId, items, workers, action):
+        # calls action(conn, item) for every item using up to "workers"
+        # connections cloned from connId; returns list of (item, error) pairs.
+        # Workers which cannot connect (e.g. because of server connection limit)
+        # leave their items to the others, so only items which were not handled fail.
+        workers = max(1, min(int(workers), len(items)))
+        tasks = queue.Queue()
+        for item in items:
+            tasks.put(item)
+        errors = []
+        connectErrors = []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                conn = self.__connectWorker(connId)
+            except ftplib.all_errors as e:
+                with lock:
+                    connectErrors.append(str(e) or repr(e))
+                return
+            try:
+                while conn is not None:
+                    try:
+                        item = tasks.get_nowait()
+                    except queue.Empty:
+                        break
+                    attempt = 1
+                    while True:
+                        try:
+                            action(conn, item)
+                            break
+                        except ftplib.all_errors as e:
+                            if attempt >= self.retryAttempts or not self.__isRetryable(e):
+                                with lock:
+                                    errors.append((item, str(e) or repr(e)))
+                                break
+                            time.sleep(self.__retryDelay(attempt))
+                            attempt += 1
+                            conn.close()
+                            try:
+                                conn = self.__connectWorker(connId)
+                            except ftplib.all_errors as reconnectError:
+                                # worker ends, remaining items are left to other workers
+                                with lock:
+                                    errors.append((item, "%s (reconnect failed: %s)" % (str(e) or repr(e),
+                                                                                       reconnectError)))
+                                conn = None
+                                break
+                        except Exception as e:
+                            with lock:
+                                errors.append((item, str(e) or repr(e)))
+                            break
+            finally:
+                if conn is not None:
+                    try:
+                        conn.quit()
+                    except Exception:
+                        conn.close()
+
+        threads = [threading.Thread(target=worker) for i in range(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for e in connectErrors:
+            logger.info("Additional connection could not be opened (%s), its share of work was done "
+                        "by other connections" % e)
+        if not tasks.empty():
+            # no worker was left to handle remaining items
+            raise FtpLibraryError("; ".join(connectErrors + ["%s: %s" % e for e in errors]))
+        return errors
+
+    def __walkRemoteTree(self, thisConn, remoteDir):
+        # returns list of directories and dictionary of file entries found
+        # below remoteDir, keyed by paths relative to it
+        dirs = []
+        files = {}
+        pending = [""]
+        while pending:
+            relDir = pending.pop()
+            absDir = posixpath.join(remoteDir, relDir) if relDir else remoteDir
+            for entry in self.__listEntries(thisConn, absDir):
+                relPath = posixpath.join(relDir, entry['name']) if relDir else entry['name']
+                if entry['type'] == 'dir':
+                    dirs.append(relPath)
+                    pending.append(relPath)
+                else:
+                    files[relPath] = entry
+        return dirs, files
+
+    def __listEntries(self, thisConn, absDir):
+        # returns list of entry dictionaries (name, type, size, modify, perm),
+        # using MLSD when server supports it and parsing LIST output otherwise
+        entries = []
+        try:
+            for name, facts in thisConn.mlsd(absDir):
+                facts = dict((k.lower(), v) for k, v in facts.items())
+                entryType = facts.get('type', '').lower()
+                if entryType in ('cdir', 'pdir') or name in ('.', '..'):
+                    continue
+                if entryType not in ('file', 'dir'):
+                    entryType = 'link' if 'link' in entryType else 'other'
+                size = facts.get('size', facts.get('sizd'))
+                entries.append({'name': name, 'type': entryType,
+                                'size': int(size) if size and size.isdigit() else None,
+                                'modify': facts.get('modify', '')[:14] or None,
+                                'perm': facts.get('perm')})
+            return entries
+        except ftplib.error_perm:
+            pass
+        lines = []
+        thisConn.retrlines("LIST " + absDir, lines.append)
+        for line in lines:
+            entry = self.__parseListLine(line)
+            if entry is None:
+                if not line.startswith('total '):
+                    logger.debug("Unrecognized LIST line skipped: %s" % line)
+            elif entry['name'] not in ('.', '..'):
+                entries.append(entry)
+        return entries
+
+    def __parseListLine(self, line):
+        # unix style: drwxr-xr-x 2 owner group 4096 Feb 27 10:15 name
+        parts = line.split(None, 8)
+        if len(parts) == 9 and parts[0][:1] in '-dlbcps' and parts[4].isdigit():
+            perm, size, month, day, timeOrYear, name = (parts[0], parts[4], parts[5],
+                                                        parts[6], parts[7], parts[8])
+            entryType = {'-': 'file', 'd': 'dir', 'l': 'link'}.get(perm[0], 'other')
+            if entryType == 'link':
+                name = name.split(' -> ')[0]
+            return {'name': name, 'type': entryType, 'size': int(size),
+                    'modify': self.__listTimestamp(month, day, timeOrYear), 'perm': perm}
+        # MS-DOS style: 02-27-20  10:15AM  <DIR>  name
+        match = re.match(r'(\d{2})-(\d{2})-(\d{2,4})\s+(\d{1,2}):(\d{2})([AP]M)?\s+(<DIR>|\d+)\s+(.+)$', line)
+        if match:
+            month, day, year, hour, minute, ampm, size, name = match.groups()
+            year = int(year) + (2000 if len(year) == 2 and int(year) < 70 else 1900 if len(year) == 2 else 0)
+            hour = int(hour) % 12 + (12 if ampm == 'PM' else 0) if ampm else int(hour)
+            isDir = size == '<DIR>'
+            return {'name': name, 'type': 'dir' if isDir else 'file',
+                    'size': None if isDir else int(size),
+                    'modify': "%04d%s%s%02d%s00" % (year, month, day, hour, minute), 'perm': None}
+        return None
+
+    def __listTimestamp(self, month, day, timeOrYear):
+        # converts LIST date columns to MLSD-like YYYYMMDDHHMMSS string
+        try:
+            if ':' in timeOrYear:
+                now = datetime.datetime.now()
+                stamp = datetime.datetime.strptime("%s %s %d %s" % (month, day, now.year, timeOrYear),
+                                                   "%b %d %Y %H:%M")
+                # entries without year are from the last 12 months
+                if stamp > now + datetime.timedelta(days=1):
+                    stamp = stamp.replace(year=now.year - 1)
+            else:
+                stamp = datetime.datetime.strptime("%s %s %s" % (month, day, timeOrYear), "%b %d %Y")
+            return stamp.strftime("%Y%m%d%H%M%S")
+        except ValueError:
+            return None
+
+    def __workingDir(self, connId):
+        # current directory of connId, PWD is sent only after it was changed
+        if self.workingDirs.get(connId) is None:
+            self.workingDirs[connId] = self.__getConnection(connId).pwd()
+        return self.workingDirs[connId]
+
+    def __cachedListing(self, connId, absDir):
+        thisConn = self.__getConnection(connId)
+        connCache = self.listingCache.setdefault(connId, {})
+        if absDir in connCache:
+            timestamp, entries = connCache[absDir]
+            if time.time() - timestamp < self.listingCacheTtl:
+                return entries
+        entries = self.__listEntries(thisConn, absDir)
+        if self.listingCacheTtl > 0:
+            connCache[absDir] = (time.time(), entries)
+        return entries
+
+    def __invalidateListing(self, connId):
+        self.listingCache.pop(connId, None)
+
+    def __isTrue(self, value):
+        if isinstance(value, bool):
+            return value
+        return str(value).lower() not in ('false', 'no', 'off', '0', 'none', '')
+
+    def __reconnect(self, connId, currentDir):
+        # replaces connection connId with a new one opened with the same settings
+        oldConn = self.__getConnection(connId)
+        newFtp = self.__cloneConnection(connId)
+        oldConn.close()
+        self.ftpList[connId] = newFtp
+        if currentDir is not None:
+            newFtp.cwd(currentDir)
+        return newFtp
+
+    def __isRetryable(self, error):
+        # connection problems are always transient, server replies only with listed codes;
+        # errors of local files (missing directory, full disk...) are never retried
+        if isinstance(error, ftplib.Error):
+            return str(error)[:3] in self.retryCodes
+        if isinstance(error, (EOFError, socket.timeout, socket.gaierror, socket.herror)):
+            return True
+        if ssl is not None and isinstance(error, (ssl.SSLEOFError, ssl.SSLZeroReturnError)):
+            return True
+        return getattr(error, 'errno', None) in NETWORK_ERRNOS
+
+    def __retryDelay(self, attempt):
+        # exponential backoff with jitter
+        return self.retryBackoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+    def __execute(self, connId, operation):
+        # calls operation(connection) according to retry policy: after transient failure
+        # connection is reopened, working directory restored and operation repeated
+        attempt = 1
+        currentDir = None
+        if self.retryAttempts > 1:
+            try:
+                currentDir = self.__workingDir(connId)
+            except ftplib.all_errors:
+                pass
+        while True:
+            thisConn = self.__getConnection(connId)
+            try:
+                return operation(thisConn)
+            except ftplib.all_errors as e:
+                if attempt >= self.retryAttempts or not self.__isRetryable(e):
+                    raise
+                delay = self.__retryDelay(attempt)
+                logger.info("Attempt %d failed (%s), retrying in %.2f s" % (attempt, e, delay))
+                time.sleep(delay)
+                attempt += 1
+                try:
+                    self.__reconnect(connId, currentDir)
+                except ftplib.all_errors as reconnectError:
+                    logger.info("Reconnect failed: %s" % reconnectError)
+
+    def __resumeTransfer(self, connId, retries, transfer):
+        # calls transfer(conn) until it succeeds, reconnecting after failures considered
+        # transient by retry policy and waiting as the policy says
+        thisConn = self.__getConnection(connId)
+        currentDir = self.__workingDir(connId)
+        attempt = 0
+        while True:
+            try:
+                return transfer(thisConn)
+            except ftplib.all_errors as e:
+                attempt += 1
+                if attempt > int(retries) or not self.__isRetryable(e):
+                    raise
+                delay = self.__retryDelay(attempt)
+                logger.info("Transfer interrupted (%s), resuming in %.2f s (attempt %d of %s)" %
+                            (e, delay, attempt, retries))
+                time.sleep(delay)
+                thisConn = self.__reconnect(connId, currentDir)
+
+    def __resumeDownload(self, thisConn, remoteFileName, localPath, blocksize, digest=None):
+        offset = 0
+        remoteSize = None
+        if os.path.isfile(localPath):
+            thisConn.voidcmd("TYPE I")
+            try:
+                remoteSize = thisConn.size(remoteFileName)
+                offset = os.path.getsize(localPath)
+            except ftplib.error_perm as e:
+                # without size it is not known whether local file is a part of remote one
+                logger.info("Size of %s is not available (%s), whole file is downloaded" % (remoteFileName, e))
+            if remoteSize is not None and offset > remoteSize:
+                offset = 0
+        # part already present locally is not transferred, so it is hashed from disk
+        if digest is not None:
+            digest.reset()
+            digest.updateFromFile(localPath, offset, blocksize)
+        if offset and offset == remoteSize:
+            return "File %s already complete (%d bytes)" % (localPath, offset)
+        with open(localPath, 'r+b' if offset else 'wb') as localFile:
+            localFile.seek(offset)
+            localFile.truncate()
+            return self.__retrieveInto(thisConn, "RETR " + remoteFileName, localFile, blocksize, offset or None,
+                                       digest.update if digest is not None else None)
+
+    def __resumeUpload(self, thisConn, localFilePath, remoteFileName, blocksize, digest=None):
+        localSize = os.path.getsize(localFilePath)
+        thisConn.voidcmd("TYPE I")
+        try:
+            offset = thisConn.size(remoteFileName) or 0
+        except ftplib.error_perm:
+            offset = 0
+        if offset > localSize:
+            offset = 0
+        if digest is not None:
+            digest.reset()
+            digest.updateFromFile(localFilePath, offset, blocksize)
+        if offset == localSize:
+            return "File %s already complete (%d bytes)" % (remoteFileName, offset)
+        onBlock = digest.update if digest is not None else None
+        with open(localFilePath, "rb") as localFile:
+            if offset:
+                localFile.seek(offset)
+                return self.__storeFrom(thisConn, "APPE " + remoteFileName, localFile, blocksize, onBlock=onBlock)
+            return self.__storeFrom(thisConn, "STOR " + remoteFileName, localFile, blocksize, onBlock=onBlock)
+
+    def __serverDigest(self, thisConn, remoteFileName, digest):
+        # returns checksum computed by server (HASH, or XCRC/XMD5/XSHA*), None when not supported
+        commands = [("OPTS HASH " + digest.hashName, "HASH " + remoteFileName)]
+        if digest.xCommand:
+            commands.append((None, digest.xCommand + " " + remoteFileName))
+        for optsCmd, hashCmd in commands:
+            try:
+                if optsCmd:
+                    thisConn.sendcmd(optsCmd)
+                serverDigest = digest.parseReply(thisConn.sendcmd(hashCmd), optsCmd is not None)
+            except ftplib.error_perm:
+                continue
+            if serverDigest is not None:
+                return serverDigest
+        return None
+
+    def __verifyChecksum(self, thisConn, remoteFileName, digest):
+        # compares digest with checksum computed by server
+        serverDigest = self.__serverDigest(thisConn, remoteFileName, digest)
+        if serverDigest is None:
+            logger.info("Server does not support %s checksum of %s, verification skipped." %
+                        (digest.algorithm, remoteFileName))
+        elif serverDigest != digest.hexdigest():
+            raise FtpLibraryError("Checksum mismatch for %s: transferred %s, server %s" %
+                                  (remoteFileName, digest.hexdigest(), serverDigest))
+
+    def __retrieveInto(self, thisConn, cmd, localFile, blocksize, rest=None, onBlock=None):
+        # binary retrieve reading into one reusable buffer instead of a bytes object per block;
+        # onBlock, if given, is called with every received block
+        thisConn.voidcmd("TYPE I")
+        decompressor = zlib.decompressobj() if self.__useCompression(thisConn, rest is None) else None
+        start = time.time()
+        total = 0
+        dataConn = thisConn.transfercmd(cmd, rest)
+        try:
+            buf = bytearray(blocksize)
+            view = memoryview(buf)
+            while True:
+                received = dataConn.recv_into(buf)
+                if not received:
+                    break
+                total += received
+                if decompressor is None:
+                    block = view[:received]
+                else:
+                    block = decompressor.decompress(view[:received])
+                localFile.write(block)
+                if onBlock is not None:
+                    onBlock(block)
+            if decompressor is not None:
+                block = decompressor.flush()
+                localFile.write(block)
+                if onBlock is not None:
+                    onBlock(block)
+            if ssl is not None and isinstance(dataConn, ssl.SSLSocket):
+                dataConn.unwrap()
+        finally:
+            dataConn.close()
+            self.__recordTransfer(thisConn, total, 0, time.time() - start)
+        return thisConn.voidresp()
+
+    def __storeFrom(self, thisConn, cmd, localFile, blocksize, rest=None, onBlock=None):
+        # binary store from current position of localFile; regular files are sent over
+        # plain sockets with sendfile unless onBlock has to be called with every block
+        thisConn.voidcmd("TYPE I")
+        compressor = zlib.compressobj() if self.__useCompression(thisConn, rest is None) else None
+        start = time.time()
+        total = 0
+        dataConn = thisConn.transfercmd(cmd, rest)
+        try:
+            isSsl = ssl is not None and isinstance(dataConn, ssl.SSLSocket)
+            if onBlock is None and compressor is None and not isSsl and hasattr(dataConn, 'sendfile') and \
+                    isinstance(localFile, io.BufferedReader):
+                total = dataConn.sendfile(localFile, localFile.tell())
+            else:
+                buf = bytearray(blocksize)
+                view = memoryview(buf)
+                while True:
+                    read = localFile.readinto(buf)
+                    if not read:
+                        break
+                    if onBlock is not None:
+                        onBlock(view[:read])
+                    if compressor is None:
+                        dataConn.sendall(view[:read])
+                        total += read
+                    else:
+                        block = compressor.compress(view[:read])
+                        dataConn.sendall(block)
+                        total += len(block)
+                if compressor is not None:
+                    block = compressor.flush()
+                    dataConn.sendall(block)
+                    total += len(block)
+                if isSsl:
+                    dataConn.unwrap()
+        finally:
+            dataConn.close()
+            self.__recordTransfer(thisConn, 0, total, time.time() - start)
+        return thisConn.voidresp()
+
+    def __downloadPath(self, remoteFileName, localFilePath):
+        if localFilePath == None:
+            return remoteFileName
+        localPath = os.path.normpath(localFilePath)
+        if os.path.isdir(localPath):
+            localPath = os.path.join(localPath, remoteFileName)
+        return localPath
+
+    def __useCompression(self, thisConn, allowed=True):
+        # switches MODE Z on or off if connection negotiated it, returns True when on
+        if not thisConn.compression:
+            return False
+        if allowed != thisConn.modeZ:
+            thisConn.voidcmd("MODE Z" if allowed else "MODE S")
+            thisConn.modeZ = allowed
+        return allowed
+
+    def __recordTransfer(self, thisConn, received, sent, elapsed):
+        statistics = getattr(thisConn, 'statistics', None)
+        if statistics is not None:
+            statistics.addTransfer(received, sent, elapsed)
+
+    def __segmentedDownload(self, connId, remoteFileName, localPath, segments, blocksize):
+        thisConn = self.__getConnection(connId)
+        thisConn.voidcmd("TYPE I")
+        remotePath = posixpath.join(thisConn.pwd(), remoteFileName)
+        fileSize = thisConn.size(remotePath)
+        if fileSize is None:
+            raise FtpLibraryError("Size of %s could not be determined." % remoteFileName)
+        # segments smaller than 1 MiB are not worth an additional connection
+        segments = max(1, min(segments, fileSize // (1024 * 1024)))
+        segmentSize = fileSize // segments
+        ranges = [(i * segmentSize, fileSize if i == segments - 1 else (i + 1) * segmentSize)
+                  for i in range(segments)]
+        with open(localPath, 'wb') as localFile:
+            localFile.truncate(fileSize)
+
+        def download(conn, byteRange):
+            start, end = byteRange
+            conn.voidcmd("TYPE I")
+            self.__useCompression(conn, False)
+            with open(localPath, 'r+b') as localFile:
+                localFile.seek(start)
+                started = time.time()
+                dataConn = conn.transfercmd("RETR " + remotePath, rest=start or None)
+                try:
+                    buf = bytearray(blocksize)
+                    view = memoryview(buf)
+                    remaining = end - start
+                    while remaining > 0:
+                        received = dataConn.recv_into(buf, min(remaining, blocksize))
+                        if not received:
+                            break
+                        localFile.write(view[:received])
+                        remaining -= received
+                finally:
+                    dataConn.close()
+                    self.__recordTransfer(conn, end - start - remaining, 0, time.time() - started)
+            # server replies 226 when whole tail was sent or 426 after early close
+            try:
+                conn.voidresp()
+            except ftplib.error_temp:
+                pass
+            if remaining > 0:
+                raise FtpLibraryError("Segment %d-%d ended %d bytes early." % (start, end, remaining))
+
+        errors = self.__runInParallel(connId, ranges, segments, download)
+        if errors:
+            raise FtpLibraryError("Failed to download %d segment(s): %s" % (len(errors),
+                                  "; ".join("%s: %s" % e for e in errors)))
+        return "Downloaded %d bytes in %d segment(s)" % (fileSize, segments)
+
+    def __walkLocalTree(self, localPath, checksum=False):
+        # returns list of directories and dictionary of file records (size, mtime
+        # and optionally sha256 hash) found below localPath, keyed by relative paths
+        dirs = []
+        files = {}
+        for root, dirNames, fileNames in os.walk(localPath):
+            relRoot = os.path.relpath(root, localPath)
+            relRoot = "" if relRoot == os.curdir else relRoot.replace(os.sep, '/')
+            for d in dirNames:
+                dirs.append(posixpath.join(relRoot, d) if relRoot else d)
+            for f in fileNames:
+                stat = os.stat(os.path.join(root, f))
+                record = {'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+                if checksum:
+                    record['hash'] = self.__fileHash(os.path.join(root, f))
+                files[posixpath.join(relRoot, f) if relRoot else f] = record
+        return dirs, files
+
+    def __fileHash(self, path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as localFile:
+            for block in iter(lambda: localFile.read(self.blocksize), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def __modifyToEpoch(self, modify):
+        if not modify:
+            return None
+        try:
+            return calendar.timegm(time.strptime(modify[:14], "%Y%m%d%H%M%S"))
+        except ValueError:
+            return None
+
+    def __loadManifest(self, manifestFile, header):
+        # returns manifest saved by previous sync of the same directories
+        if not manifestFile or not os.path.isfile(manifestFile):
+            return None
+        try:
+            with open(manifestFile) as f:
+                manifest = json.load(f)
+        except ValueError:
+            logger.warn("Manifest %s is not valid JSON, ignored." % manifestFile)
+            return None
+        for key in header:
+            if manifest.get(key) != header[key]:
+                return None
+        if not isinstance(manifest.get('files'), dict) or not isinstance(manifest.get('dirs'), list):
+            return None
+        return manifest
+
+    def __saveManifest(self, manifestFile, header, dirs, files):
+        manifest = dict(header)
+        manifest['dirs'] = sorted(dirs)
+        manifest['files'] = files
+        with open(manifestFile, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+
+    def __makeRemoteDir(self, thisConn, path):
+        # creates remote directory, existing directory is not an error. Servers answer
+        # 550 also when directory cannot be created, so its existence is checked with CWD
+        try:
+            thisConn.mkd(path)
+        except ftplib.error_perm as e:
+            if not str(e)[:3] in ('550', '521'):
+                raise
+            currentDir = thisConn.pwd()
+            try:
+                thisConn.cwd(path)
+            except ftplib.error_perm:
+                raise e
+            thisConn.cwd(currentDir)
 
     def __isTlsConnection(self, connObject):
         if not isinstance(connObject, ftplib.FTP_TLS):
@@ -120,11 +853,11 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
             outputMsg += str(counter) + ". " + k + " "
             outputMsg += str(self.ftpList[k]) + "\n"
             counter += 1
-        if self.printOutput:
-            logger.info(outputMsg)
+        self.__log(outputMsg)
         return self.ftpList
 
-    def ftp_connect(self, host, user='anonymous', password='anonymous@', port=21, timeout=30, connId='default', tls=False, mode='passive'):
+    def ftp_connect(self, host, user='anonymous', password='anonymous@', port=21, timeout=30, connId='default', tls=False, mode='passive',
+                    compression=False, secureData=False, caFile=None, certFile=None, keyFile=None, tlsVersion=None):
         """
         Constructs FTP object, opens a connection and login. TLS support is optional.
         Call this function before any other (otherwise raises exception).
@@ -138,6 +871,19 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
             - connId(optional) - connection identifier. By default equals 'default'
             - tls(optional) - TLS connections flag. By default False
             - mode(optional) - set the transfer mode to 'active' or 'passive'. By default 'passive'
+            - compression(optional) - compress transferred data with MODE Z if server supports it.
+              Resumed and segmented downloads and server-to-server transfers are not compressed.
+              By default False
+            - secureData(optional) - with TLS connection switch to secure data connection (see
+              `Secure Data Connection`) right after login. By default False
+            - caFile(optional) - with TLS connection verify server certificate against CA
+              certificates from this file. By default certificate is not verified
+            - certFile(optional) - client certificate file (PEM) used with TLS connection
+            - keyFile(optional) - private key of client certificate, if not included in certFile
+            - tlsVersion(optional) - minimal accepted TLS version: 1, 1.1, 1.2 or 1.3
+        TLS connections with the same caFile, certFile, keyFile and tlsVersion share one SSL
+        context. Secure data connections reuse TLS session of control connection, which
+        shortens handshakes and is required by many servers.
             
         Examples:
         | ftp connect | 192.168.1.10 | mylogin | mypassword |  |  |
@@ -148,38 +894,52 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         | ftp connect | 192.168.1.10 | mylogin | mypassword | timeout=20 |  |
         | ftp connect | 192.168.1.10 | port=29 | timeout=20 |  |  |
         | ftp connect | 192.168.1.10 | port=29 | timeout=20 | mode=active |  |
+        | ftp connect | 192.168.1.10 | mylogin | mypassword | compression=True |  |
+        | ftp connect | 192.168.1.10 | mylogin | mypassword | tls=True | secureData=True |
+        | ftp connect | 192.168.1.10 | mylogin | mypassword | tls=True | caFile=${CURDIR}/ca.pem |
         """
         if connId in self.ftpList:
             errMsg = "Connection with ID %s already exist. It should be deleted before this step." % connId
             raise FtpLibraryError(errMsg)
         else:
-            newFtp = None
             outputMsg = ""
             try:
-                timeout = int(timeout)
-                port = int(port)
-                newFtp = None
-                if tls:
-                    newFtp = ftplib.FTP_TLS()
+                settings = {'host': host, 'user': user, 'password': password,
+                            'port': int(port), 'timeout': int(timeout),
+                            'tls': tls, 'mode': mode, 'compression': self.__isTrue(compression),
+                            'secureData': self.__isTrue(secureData), 'caFile': caFile, 'certFile': certFile,
+                            'keyFile': keyFile, 'tlsVersion': tlsVersion}
+                statistics = self.ftpStatistics.setdefault(connId, _FtpStatistics())
+                if self.connectionPool:
+                    key = tuple(str(settings[k]) for k in sorted(settings) if k != 'timeout')
+                    newFtp, outputMsg, home = _connectionPool.acquire(
+                        key, lambda: self.__createConnection(settings, statistics), self.keepaliveInterval)
+                    newFtp.statistics = statistics
+                    if settings['tls'] and settings['secureData'] and not newFtp._prot_p:
+                        newFtp.prot_p()
+                    self.pooledConnections[connId] = (key, home)
                 else:
-                    newFtp = ftplib.FTP()
-                outputMsg += newFtp.connect(host, port, timeout)
+                    attempt = 1
+                    while True:
+                        try:
+                            newFtp, outputMsg = self.__createConnection(settings, statistics)
+                            break
+                        except ftplib.all_errors as e:
+                            if attempt >= self.retryAttempts or not self.__isRetryable(e):
+                                raise
+                            time.sleep(self.__retryDelay(attempt))
+                            attempt += 1
                 self.__addNewConnection(newFtp, connId)
-                outputMsg += newFtp.login(user, password)
-                
-                # set mode depending of "mode" value. if it is not "active" or "passive" default to passive
-                newFtp.set_pasv({'passive': True, 'active': False}.get(mode, True))
-                
+                self.connSettings[connId] = settings
             except socket.error as se:
-                raise FtpLibraryError('Socket error exception occured.')
+                raise FtpLibraryError('Socket error exception occured: %s' % se)
             except ftplib.all_errors as e:
                 if connId in self.ftpList:
                     self.ftp_close(connId)
                 raise FtpLibraryError(str(e))
             except Exception as e:
                 raise FtpLibraryError(str(e))
-            if self.printOutput:
-                logger.info(outputMsg)
+            self.__log(outputMsg)
 
     def clear_text_data_connection(self, connId='default'):
         """
@@ -192,11 +952,10 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         thisConn = self.__getConnection(connId)
         self.__isTlsConnection(thisConn)
         try:
-            thisConn.prot_c()
+            self.__execute(connId, lambda conn: conn.prot_c())
         except ftplib.all_errors as e:
             raise FtpLibraryError(str(e))
-        if self.printOutput:
-            logger.info(outputMsg)
+        self.__log(outputMsg)
         return outputMsg
 
     def secure_data_connection(self, connId='default'):
@@ -210,11 +969,10 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         thisConn = self.__getConnection(connId)
         self.__isTlsConnection(thisConn)
         try:
-            thisConn.prot_p()
+            self.__execute(connId, lambda conn: conn.prot_p())
         except ftplib.all_errors as e:
             raise FtpLibraryError(str(e))
-        if self.printOutput:
-            logger.info(outputMsg)
+        self.__log(outputMsg)
         return outputMsg
 
     def get_welcome(self, connId='default'):
@@ -229,8 +987,7 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
             outputMsg += thisConn.getwelcome()
         except ftplib.all_errors as e:
             raise FtpLibraryError(str(e))
-        if self.printOutput:
-            logger.info(outputMsg)
+        self.__log(outputMsg)
         return outputMsg
 
     def pwd(self, connId='default'):
@@ -242,11 +999,10 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         thisConn = self.__getConnection(connId)
         outputMsg = ""
         try:
-            outputMsg += thisConn.pwd()
+            outputMsg += self.__execute(connId, lambda conn: conn.pwd())
         except ftplib.all_errors as e:
             raise FtpLibraryError(str(e))
-        if self.printOutput:
-            logger.info(outputMsg)
+        self.__log(outputMsg)
         return outputMsg
 
     def cwd(self, directory, connId='default'):
@@ -261,30 +1017,53 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         thisConn = self.__getConnection(connId)
         outputMsg = ""
         try:
-            outputMsg += thisConn.cwd(directory)
+            outputMsg += self.__execute(connId, lambda conn: conn.cwd(directory))
+            # server decides where e.g. "link/.." leads, so new directory is read with PWD when needed
+            self.workingDirs.pop(connId, None)
         except ftplib.all_errors as e:
             raise FtpLibraryError(str(e))
-        if self.printOutput:
-            logger.info(outputMsg)
+        self.__log(outputMsg)
         return outputMsg
 
-    def dir(self, connId='default'):
+    def dir(self, connId='default', localFile=None):
         """
         Returns list of raw lines returned as contens of current directory.
+        With localFile given, lines are streamed to that local file (UTF-8) instead of
+        being kept in memory and logged, and number of lines is returned.
         Parameters:
         - connId(optional) - connection identifier. By default equals 'default'
+        - localFile(optional) - path of a local file where listing is saved
+        Example:
+        | ${lines}= | dir |  |
+        | ${count}= | dir | localFile=${OUTPUT DIR}/listing.txt |
         """
         dirList = []
         thisConn = self.__getConnection(connId)
-        outputMsg = ""
+        counter = [0]
+
+        def listing(conn):
+            del dirList[:]
+            conn.dir(dirList.append)
+
+        def streaming(conn):
+            counter[0] = 0
+            with io.open(localFile, 'w', encoding='utf-8') as f:
+                def write(line):
+                    f.write(line + u"\n")
+                    counter[0] += 1
+                conn.dir(write)
+
         try:
-            thisConn.dir(dirList.append)
-            for d in dirList:
-                outputMsg += str(d) + "\n"
+            if localFile is not None:
+                self.__execute(connId, streaming)
+            else:
+                self.__execute(connId, listing)
         except ftplib.all_errors as e:
             raise FtpLibraryError(str(e))
-        if self.printOutput:
-            logger.info(outputMsg)
+        if localFile is not None:
+            self.__log("%d line(s) saved to %s" % (counter[0], localFile))
+            return counter[0]
+        self.__log(dirList)
         return dirList
 
     def dir_names(self, connId='default'):
@@ -296,11 +1075,64 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         files_list = []
         thisConn = self.__getConnection(connId)
         try:
-            files_list = thisConn.nlst()
+            files_list = self.__execute(connId, lambda conn: conn.nlst())
         except:
             files_list = []
         return files_list
 
+    def list_directory(self, directory=None, connId='default'):
+        """
+        Returns list of entries of given directory (by default current directory).
+        Each entry is a dictionary with keys: name, type ('file', 'dir', 'link' or
+        'other'), size (bytes, None if unknown), modify (YYYYMMDDHHMMSS, None if
+        unknown) and perm. MLSD command is used when supported by server, otherwise
+        LIST output is parsed. Listing is cached for time given in library import.
+        Parameters:
+        - directory(optional) - path to a directory on FTP server
+        - connId(optional) - connection identifier. By default equals 'default'
+        Example:
+        | ${entries}= | list directory | /home/myname/tmp |
+        | FOR | ${entry} | IN | @{entries} |
+        |  | Log | ${entry}[name] ${entry}[size] |
+        """
+        self.__getConnection(connId)
+        try:
+            absDir = posixpath.join(self.__workingDir(connId), directory or "")
+            entries = self.__execute(connId, lambda conn: self.__cachedListing(connId, absDir))
+        except ftplib.all_errors as e:
+            raise FtpLibraryError(str(e))
+        self.__log("%d entries in %s" % (len(entries), absDir))
+        return [dict(entry) for entry in entries]
+
+    def get_file_info(self, remotePath, connId='default'):
+        """
+        Returns entry dictionary (name, type, size, modify, perm - see `List Directory`)
+        of given file or directory, or None if it does not exist. Information is taken
+        from cached listing of parent directory, so repeated checks do not communicate
+        with server until cache expires or is cleared.
+        Parameters:
+        - remotePath - file name or path on FTP server
+        - connId(optional) - connection identifier. By default equals 'default'
+        Example:
+        | ${info}= | get file info | report.xml |
+        | Should Not Be Equal | ${info} | ${None} |
+        | Should Be Equal As Numbers | ${info}[size] | 1024 |
+        """
+        self.__getConnection(connId)
+        parentDir, name = posixpath.split(remotePath.rstrip('/'))
+        try:
+            absDir = posixpath.join(self.__workingDir(connId), parentDir)
+            entries = self.__execute(connId, lambda conn: self.__cachedListing(connId, absDir))
+        except ftplib.error_perm:
+            entries = []
+        except ftplib.all_errors as e:
+            raise FtpLibraryError(str(e))
+        for entry in entries:
+            if entry['name'] == name:
+                self.__log(str(entry))
+                return dict(entry)
+        return None
+
     def mkd(self, newDirName, connId='default'):
         """
         Creates new directory on FTP server. Returns new directory path.
@@ -310,12 +1142,12 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         """
         thisConn = self.__getConnection(connId)
         outputMsg = ""
+        self.__invalidateListing(connId)
         try:
-            outputMsg += str(thisConn.mkd(newDirName))
+            outputMsg += str(self.__execute(connId, lambda conn: conn.mkd(newDirName)))
         except ftplib.all_errors as e:
             raise FtpLibraryError(str(e))
-        if self.printOutput:
-            logger.info(outputMsg)
+        self.__log(outputMsg)
         return outputMsg
 
     def rmd(self, directory, connId='default'):
@@ -327,15 +1159,62 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         """
         thisConn = self.__getConnection(connId)
         outputMsg = ""
+        self.__invalidateListing(connId)
         try:
-            outputMsg += str(thisConn.rmd(directory))
+            outputMsg += str(self.__execute(connId, lambda conn: conn.rmd(directory)))
         except ftplib.all_errors as e:
             raise FtpLibraryError(str(e))
-        if self.printOutput:
-            logger.info(outputMsg)
+        self.__log(outputMsg)
         return outputMsg
 
-    def download_file(self, remoteFileName, localFilePath=None, connId='default'):
+    def remove_directory_recursively(self, directory, workers=4, connId='default'):
+        """
+        Deletes directory together with all its content from FTP server. Files are
+        deleted in parallel over several connections opened with the same settings as
+        given connection, then directories are removed starting from the deepest ones.
+        Returns number of deleted files.
+        Parameters:
+        - directory - path to a directory to be deleted
+        - workers(optional) - number of parallel connections. By default 4
+        - connId(optional) - connection identifier. By default equals 'default'
+        Example:
+        | remove directory recursively | /home/myname/test_output |
+        | ${count}= | remove directory recursively | results | workers=8 | connId=ftp1 |
+        """
+        self.__getConnection(connId)
+        self.__invalidateListing(connId)
+        try:
+            remotePath = posixpath.join(self.__workingDir(connId), directory)
+            dirs, files = self.__execute(connId, lambda conn: self.__walkRemoteTree(conn, remotePath))
+        except ftplib.all_errors as e:
+            raise FtpLibraryError(str(e))
+        errors = []
+        if files:
+            errors = self.__runInParallel(connId, list(files), workers,
+                                          lambda conn, relPath: conn.delete(posixpath.join(remotePath, relPath)))
+        # directories still containing files which failed to be deleted are kept
+        keptDirs = set()
+        for relPath, e in errors:
+            while relPath:
+                relPath = posixpath.dirname(relPath)
+                keptDirs.add(relPath)
+        try:
+            for d in sorted(dirs, key=lambda d: d.count('/'), reverse=True) + [""]:
+                if d in keptDirs:
+                    continue
+                dirPath = posixpath.join(remotePath, d) if d else remotePath
+                self.__execute(connId, lambda conn: conn.rmd(dirPath))
+        except ftplib.all_errors as e:
+            raise FtpLibraryError(str(e))
+        if errors:
+            raise FtpLibraryError("Failed to delete %d file(s): %s" % (len(errors),
+                                  "; ".join("%s: %s" % e for e in errors)))
+        outputMsg = "Deleted %d file(s) and %d dir(s) in %s" % (len(files), len(dirs) + 1, remotePath)
+        self.__log(outputMsg)
+        return len(files)
+
+    def download_file(self, remoteFileName, localFilePath=None, connId='default', resume=False, retries=3, segments=1, blocksize=None,
+                      checksum=None, verifyOnServer=False):
         """
         Downloads file from current directory on FTP server in binary mode. If
         localFilePath is not given, file is saved in current local directory (by
@@ -345,6 +1224,24 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         - remoteFileName - file name on FTP server
         - localFilePath (optional) - local file name or path where remote file should be saved.
         - connId(optional) - connection identifier. By default equals 'default'
+        - resume(optional) - if True and local file already exists, only missing part
+          of remote file is downloaded (REST command). By default False
+        - retries(optional) - in resume mode, number of additional attempts made after
+          a transient failure (see `Set Retry Policy` for failures considered transient
+          and waiting time). Each attempt reconnects and continues from the last
+          received byte. By default 3
+        - segments(optional) - number of parallel connections used to download a single
+          large file. Each connection fetches its own byte range (REST command) which is
+          written directly at its offset in the local file. Cannot be combined with resume.
+          By default 1
+        - blocksize(optional) - size of a block in bytes. By default value given during
+          library import is used
+        - checksum(optional) - md5, sha1, sha256 or crc32. If given, checksum of received
+          data is calculated during transfer and returned instead of server output.
+          Cannot be combined with segments.
+        - verifyOnServer(optional) - if True, checksum is compared with the one calculated
+          by server (HASH, XCRC, XMD5, XSHA1 or XSHA256 command), when server supports it.
+          By default False
         localFilePath variable can have following meanings:
         1. file name (will be saved in current default directory);
         2. full path (dir + file name)
@@ -355,26 +1252,47 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         | download file | a.txt | D:/rfftppy/tmp |  |
         | download file | a.txt | D:/rfftppy/tmp/b.txt |  |
         | download file | a.txt | D:\\rfftppy\\tmp\\c.txt |  |
+        | download file | firmware.bin | D:/rfftppy/tmp | resume=True |
+        | download file | firmware.bin | D:/rfftppy/tmp | segments=4 |
+        | ${sha}= | download file | firmware.bin | checksum=sha256 | verifyOnServer=True |
         """
         thisConn = self.__getConnection(connId)
         outputMsg = ""
-        localPath = ""
-        if localFilePath == None:
-            localPath = remoteFileName
-        else:
-            localPath = os.path.normpath(localFilePath)
-            if os.path.isdir(localPath):
-                localPath = os.path.join(localPath, remoteFileName)
+        blocksize = self.blocksize if blocksize == None else int(blocksize)
+        localPath = self.__downloadPath(remoteFileName, localFilePath)
+        digest = _Checksum(checksum) if checksum else None
+        if self.transferInfo and digest is None and int(segments) <= 1:
+            digest = _Checksum('sha256')
         try:
-            with open(localPath, 'wb') as localFile:
-                outputMsg += thisConn.retrbinary("RETR " + remoteFileName, localFile.write)
+            if int(segments) > 1:
+                if self.__isTrue(resume) or digest is not None:
+                    raise FtpLibraryError("Segmented download cannot be combined with resume or checksum.")
+                outputMsg += self.__segmentedDownload(connId, remoteFileName, localPath, int(segments), blocksize)
+            elif self.__isTrue(resume):
+                outputMsg += self.__resumeTransfer(connId, retries,
+                    lambda conn: self.__resumeDownload(conn, remoteFileName, localPath, blocksize, digest))
+            else:
+                def download(conn):
+                    if digest is not None:
+                        digest.reset()
+                    with open(localPath, 'wb') as localFile:
+                        return self.__retrieveInto(conn, "RETR " + remoteFileName, localFile, blocksize,
+                                                   onBlock=digest.update if digest is not None else None)
+                outputMsg += self.__execute(connId, download)
+            if digest is not None and self.__isTrue(verifyOnServer):
+                self.__verifyChecksum(self.__getConnection(connId), remoteFileName, digest)
         except ftplib.all_errors as e:
             raise FtpLibraryError(str(e))
-        if self.printOutput:
-            logger.info(outputMsg)
+        self.__log(outputMsg)
+        if self.transferInfo:
+            return {'path': os.path.abspath(localPath), 'size': os.path.getsize(localPath),
+                    'checksum': digest.hexdigest() if digest is not None else None}
+        if digest is not None:
+            return digest.hexdigest()
         return outputMsg
 
-    def upload_file(self, localFileName, remoteFileName=None, connId='default'):
+    def upload_file(self, localFileName, remoteFileName=None, connId='default', resume=False, retries=3, blocksize=None,
+                    checksum=None, verifyOnServer=False):
         """
         Sends file from local drive to current directory on FTP server in binary mode.
         Returns server output.
@@ -382,6 +1300,19 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         - localFileName - file name or path to a file on a local drive.
         - remoteFileName (optional) - a name or path containing name under which file should be saved.
         - connId(optional) - connection identifier. By default equals 'default'
+        - resume(optional) - if True and remote file already exists, only missing part
+          of local file is sent (APPE command). By default False
+        - retries(optional) - in resume mode, number of additional attempts made after
+          a transient failure (see `Set Retry Policy` for failures considered transient
+          and waiting time). Each attempt reconnects and continues from the last
+          byte stored on server. By default 3
+        - blocksize(optional) - size of a block in bytes. By default value given during
+          library import is used
+        - checksum(optional) - md5, sha1, sha256 or crc32. If given, checksum of sent data
+          is calculated during transfer and returned instead of server output.
+        - verifyOnServer(optional) - if True, checksum is compared with the one calculated
+          by server (HASH, XCRC, XMD5, XSHA1 or XSHA256 command), when server supports it.
+          By default False
         If remoteFileName agument is not given, local name will be used.
         Examples:
         | upload file | x.txt | connId=ftp1 |
@@ -389,10 +1320,17 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         | upload file | u.txt | uu.txt |
         | upload file | D:/rfftppy/z.txt | zz.txt |
         | upload file | D:\\rfftppy\\v.txt |  |
+        | upload file | D:/rfftppy/firmware.bin | resume=True |
+        | ${crc}= | upload file | D:/rfftppy/firmware.bin | checksum=crc32 |
         """
         thisConn = self.__getConnection(connId)
         outputMsg = ""
         remoteFileName_ = ""
+        blocksize = self.blocksize if blocksize == None else int(blocksize)
+        digest = _Checksum(checksum) if checksum else None
+        if self.transferInfo and digest is None:
+            digest = _Checksum('sha256')
+        self.__invalidateListing(connId)
         localFilePath = os.path.normpath(localFileName)
         if not os.path.isfile(localFilePath):
             raise FtpLibraryError("Valid file path should be provided.")
@@ -406,13 +1344,832 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
             else:
                 remoteFileName_ = remoteFileName
             try:
-                outputMsg += thisConn.storbinary("STOR " + remoteFileName_, open(localFilePath, "rb"))
+                if self.__isTrue(resume):
+                    outputMsg += self.__resumeTransfer(connId, retries,
+                        lambda conn: self.__resumeUpload(conn, localFilePath, remoteFileName_, blocksize, digest))
+                else:
+                    def upload(conn):
+                        if digest is not None:
+                            digest.reset()
+                        with open(localFilePath, "rb") as localFile:
+                            return self.__storeFrom(conn, "STOR " + remoteFileName_, localFile, blocksize,
+                                                    onBlock=digest.update if digest is not None else None)
+                    outputMsg += self.__execute(connId, upload)
+                if digest is not None and self.__isTrue(verifyOnServer):
+                    self.__verifyChecksum(self.__getConnection(connId), remoteFileName_, digest)
+                if self.transferInfo:
+                    remotePath = posixpath.join(self.__workingDir(connId), remoteFileName_)
             except ftplib.all_errors as e:
                raise FtpLibraryError(str(e))
-        if self.printOutput:
-            logger.info(outputMsg)
+        self.__log(outputMsg)
+        if self.transferInfo:
+            return {'path': remotePath, 'size': os.path.getsize(localFilePath), 'checksum': digest.hexdigest()}
+        if digest is not None:
+            return digest.hexdigest()
+        return outputMsg
+
+    def download_directory(self, remoteDir, localDir=None, workers=4, connId='default'):
+        """
+        Downloads recursively a directory from FTP server in binary mode. Files are
+        fetched in parallel over several connections opened with the same settings
+        as given connection. If localDir is not given, directory is saved in current
+        local directory with the same name as remote directory.
+        Returns list of downloaded local file paths.
+        Parameters:
+        - remoteDir - directory name or path on FTP server
+        - localDir (optional) - local directory path where remote directory content should be saved.
+        - workers (optional) - number of parallel connections. By default 4
+        - connId(optional) - connection identifier. By default equals 'default'
+        Examples:
+        | download directory | artifacts |  |  |
+        | download directory | /home/myname/artifacts | D:/rfftppy/tmp | workers=8 |
+        | ${files}= | download directory | artifacts | connId=ftp1 |
+        """
+        self.__getConnection(connId)
+        if localDir == None:
+            # root directory has no name, so its content goes to current directory
+            localPath = posixpath.basename(remoteDir.rstrip('/')) or os.curdir
+        else:
+            localPath = os.path.normpath(localDir)
+        try:
+            remotePath = posixpath.join(self.__workingDir(connId), remoteDir)
+            dirs, files = self.__execute(connId, lambda conn: self.__walkRemoteTree(conn, remotePath))
+        except ftplib.all_errors as e:
+            raise FtpLibraryError(str(e))
+        try:
+            for d in [""] + dirs:
+                dirPath = os.path.join(localPath, *d.split('/'))
+                if not os.path.isdir(dirPath):
+                    os.makedirs(dirPath)
+        except OSError as e:
+            raise FtpLibraryError("Local directory could not be created: %s" % e)
+
+        def download(conn, relPath):
+            with open(os.path.join(localPath, *relPath.split('/')), 'wb') as localFile:
+                self.__retrieveInto(conn, "RETR " + posixpath.join(remotePath, relPath), localFile, self.blocksize)
+
+        errors = []
+        if files:
+            errors = self.__runInParallel(connId, list(files), workers, download)
+        if errors:
+            raise FtpLibraryError("Failed to download %d file(s): %s" % (len(errors),
+                                  "; ".join("%s: %s" % e for e in errors)))
+        outputMsg = "Downloaded %d file(s) to %s" % (len(files), localPath)
+        self.__log(outputMsg)
+        return [os.path.join(localPath, *f.split('/')) for f in files]
+
+    def upload_directory(self, localDir, remoteDir=None, workers=4, connId='default'):
+        """
+        Sends recursively a directory from local drive to FTP server in binary mode.
+        Remote directory structure is created first, then files are sent in parallel
+        over several connections opened with the same settings as given connection.
+        Already existing remote directories are reused. If remoteDir is not given,
+        local directory name is used (relative to current directory on FTP server).
+        Returns list of uploaded remote file paths.
+        Parameters:
+        - localDir - directory path on a local drive.
+        - remoteDir (optional) - directory name or path on FTP server.
+        - workers (optional) - number of parallel connections. By default 4
+        - connId(optional) - connection identifier. By default equals 'default'
+        Examples:
+        | upload directory | D:/rfftppy/fixtures |  |  |
+        | upload directory | fixtures | /home/myname/fixtures | workers=8 |
+        | ${files}= | upload directory | fixtures | connId=ftp1 |
+        """
+        self.__getConnection(connId)
+        localPath = os.path.normpath(localDir)
+        if not os.path.isdir(localPath):
+            raise FtpLibraryError("Valid directory path should be provided.")
+        if remoteDir == None:
+            remoteDir = os.path.basename(os.path.abspath(localPath))
+        self.__invalidateListing(connId)
+        dirs = []
+        files = []
+        for root, dirNames, fileNames in os.walk(localPath):
+            relRoot = os.path.relpath(root, localPath)
+            relRoot = "" if relRoot == os.curdir else relRoot.replace(os.sep, '/')
+            for d in dirNames:
+                dirs.append(posixpath.join(relRoot, d) if relRoot else d)
+            for f in fileNames:
+                files.append(posixpath.join(relRoot, f) if relRoot else f)
+        try:
+            remotePath = posixpath.join(self.__workingDir(connId), remoteDir)
+
+            def makeDirs(conn):
+                for d in [""] + dirs:
+                    self.__makeRemoteDir(conn, posixpath.join(remotePath, d) if d else remotePath)
+
+            self.__execute(connId, makeDirs)
+        except ftplib.all_errors as e:
+            raise FtpLibraryError(str(e))
+
+        def upload(conn, relPath):
+            with open(os.path.join(localPath, *relPath.split('/')), 'rb') as localFile:
+                self.__storeFrom(conn, "STOR " + posixpath.join(remotePath, relPath), localFile, self.blocksize)
+
+        errors = []
+        if files:
+            errors = self.__runInParallel(connId, files, workers, upload)
+        if errors:
+            raise FtpLibraryError("Failed to upload %d file(s): %s" % (len(errors),
+                                  "; ".join("%s: %s" % e for e in errors)))
+        outputMsg = "Uploaded %d file(s) to %s" % (len(files), remotePath)
+        self.__log(outputMsg)
+        return [posixpath.join(remotePath, f) for f in files]
+
+    def download_files_matching(self, pattern, localDir=None, remoteDir=None, regex=False, workers=1,
+                                connId='default'):
+        """
+        Downloads in binary mode all files from remote directory which names match
+        given pattern. Remote directory is listed once, then matching files are fetched
+        one after another over given connection or, with workers greater than 1, in
+        parallel over connections opened with the same settings.
+        Failed files do not stop the batch. Returns dictionary with number of downloaded
+        files ('count'), their total size ('bytes') and 'failures' mapping names of
+        failed files to error messages. Server replies of single transfers are not logged.
+        Parameters:
+        - pattern - glob pattern (like *.log) or, with regex, regular expression searched in file names
+        - localDir(optional) - local directory where files are saved. By default current directory
+        - remoteDir(optional) - directory name or path on FTP server. By default current directory
+        - regex(optional) - treat pattern as regular expression. By default False
+        - workers(optional) - number of parallel connections. By default 1
+        - connId(optional) - connection identifier. By default equals 'default'
+        Examples:
+        | download files matching | *.log |  |  |
+        | ${result}= | download files matching | report_*.xml | D:/rfftppy/reports | /results |
+        | ${result}= | download files matching | ^data_\\d+\\.csv$ | regex=True | workers=4 |
+        """
+        self.__getConnection(connId)
+        localPath = os.path.normpath(localDir) if localDir else os.curdir
+        if not os.path.isdir(localPath):
+            os.makedirs(localPath)
+        try:
+            remotePath = self.__workingDir(connId)
+            if remoteDir:
+                remotePath = posixpath.join(remotePath, remoteDir)
+            entries = self.__execute(connId, lambda conn: self.__listEntries(conn, remotePath))
+        except ftplib.all_errors as e:
+            raise FtpLibraryError(str(e))
+        matches = self.__matchingNames([e['name'] for e in entries if e['type'] == 'file'], pattern, regex)
+
+        def download(conn, name):
+            with open(os.path.join(localPath, name), 'wb') as localFile:
+                self.__retrieveInto(conn, "RETR " + posixpath.join(remotePath, name), localFile, self.blocksize)
+
+        failures = self.__transferMatching(connId, matches, workers, download)
+        done = [name for name in matches if name not in failures]
+        result = {'count': len(done), 'bytes': sum(os.path.getsize(os.path.join(localPath, name)) for name in done),
+                  'failures': failures}
+        self.__log("Downloaded %d of %d matching file(s), %d bytes" % (result['count'], len(matches),
+                                                                     result['bytes']))
+        return result
+
+    def upload_files_matching(self, pattern, localDir=None, remoteDir=None, regex=False, workers=1,
+                              connId='default'):
+        """
+        Sends in binary mode all files from local directory which names match given
+        pattern. Files are sent one after another over given connection or, with workers
+        greater than 1, in parallel over connections opened with the same settings.
+        Failed files do not stop the batch. Returns dictionary with number of uploaded
+        files ('count'), their total size ('bytes') and 'failures' mapping names of
+        failed files to error messages. Server replies of single transfers are not logged.
+        Parameters:
+        - pattern - glob pattern (like *.log) or, with regex, regular expression searched in file names
+        - localDir(optional) - local directory path. By default current directory
+        - remoteDir(optional) - directory name or path on FTP server. By default current directory
+        - regex(optional) - treat pattern as regular expression. By default False
+        - workers(optional) - number of parallel connections. By default 1
+        - connId(optional) - connection identifier. By default equals 'default'
+        Examples:
+        | upload files matching | *.zip | D:/rfftppy/build |  |
+        | ${result}= | upload files matching | *.csv | fixtures | /data | workers=4 |
+        """
+        self.__getConnection(connId)
+        localPath = os.path.normpath(localDir) if localDir else os.curdir
+        if not os.path.isdir(localPath):
+            raise FtpLibraryError("Valid directory path should be provided.")
+        names = [name for name in os.listdir(localPath) if os.path.isfile(os.path.join(localPath, name))]
+        matches = self.__matchingNames(names, pattern, regex)
+        self.__invalidateListing(connId)
+        try:
+            remotePath = self.__workingDir(connId)
+        except ftplib.all_errors as e:
+            raise FtpLibraryError(str(e))
+        if remoteDir:
+            remotePath = posixpath.join(remotePath, remoteDir)
+
+        def upload(conn, name):
+            with open(os.path.join(localPath, name), 'rb') as localFile:
+                self.__storeFrom(conn, "STOR " + posixpath.join(remotePath, name), localFile, self.blocksize)
+
+        failures = self.__transferMatching(connId, matches, workers, upload)
+        done = [name for name in matches if name not in failures]
+        result = {'count': len(done), 'bytes': sum(os.path.getsize(os.path.join(localPath, name)) for name in done),
+                  'failures': failures}
+        self.__log("Uploaded %d of %d matching file(s), %d bytes" % (result['count'], len(matches),
+                                                                   result['bytes']))
+        return result
+
+    def __matchingNames(self, names, pattern, regex):
+        if self.__isTrue(regex):
+            try:
+                expression = re.compile(pattern)
+            except re.error as e:
+                raise FtpLibraryError("Invalid regular expression %s: %s" % (pattern, e))
+            return sorted(name for name in names if expression.search(name))
+        return sorted(name for name in names if fnmatch.fnmatchcase(name, pattern))
+
+    def __transferMatching(self, connId, names, workers, action):
+        # runs action(conn, name) for all names, returns dictionary of failed names and errors
+        if not names:
+            return {}
+        if int(workers) > 1:
+            return dict(self.__runInParallel(connId, names, workers, action))
+        failures = {}
+        for name in names:
+            try:
+                self.__execute(connId, lambda conn: action(conn, name))
+            except (ftplib.all_errors + (EnvironmentError, FtpLibraryError)) as e:
+                failures[name] = str(e)
+        return failures
+
+    def sync_directory(self, localDir, remoteDir, direction='upload', delete=False, manifestFile=None,
+                       checksum=False, workers=4, connId='default'):
+        """
+        Synchronizes content of local and remote directory. Only new and changed
+        files are transferred, moved files can be renamed instead of transferred again
+        and, optionally, files missing in source directory are deleted.
+        Returns dictionary with lists of 'transferred', 'renamed' and 'deleted' paths
+        and number of 'unchanged' files.
+        Parameters:
+        - localDir - directory path on a local drive.
+        - remoteDir - directory name or path on FTP server.
+        - direction(optional) - 'upload' (local to remote) or 'download' (remote to local). By default 'upload'
+        - delete(optional) - delete files and directories missing in source directory. By default False
+        - manifestFile(optional) - path of a local JSON file where state after synchronization
+          is saved. In upload direction, when manifest of previous synchronization exists,
+          remote directory is not listed at all, so remote content must not be changed
+          by others between runs. Manifest is saved also when synchronization fails.
+        - checksum(optional) - in upload direction, compare also sha256 of local files
+          with the manifest, so changes not visible in size and mtime are detected.
+          Moved files are detected only with checksum and manifest: in upload direction
+          sha256 saved in manifest is compared, in download direction server has to report
+          sha256 of the file (HASH or XSHA256 command). By default False
+        - workers(optional) - number of parallel connections used for transfers. By default 4
+        - connId(optional) - connection identifier. By default equals 'default'
+        In download direction modification time of downloaded files is set to the one
+        reported by server, which is then used to detect changes.
+        Examples:
+        | sync directory | D:/rfftppy/deploy | /srv/deploy |  |
+        | sync directory | D:/rfftppy/deploy | /srv/deploy | manifestFile=D:/rfftppy/deploy.json | delete=True |
+        | ${result}= | sync directory | results | /home/myname/results | download |
+        """
+        self.__getConnection(connId)
+        if direction not in ('upload', 'download'):
+            raise FtpLibraryError("Direction should be 'upload' or 'download'.")
+        localPath = os.path.normpath(localDir)
+        delete = self.__isTrue(delete)
+        checksum = self.__isTrue(checksum)
+        if direction == 'upload' and not os.path.isdir(localPath):
+            raise FtpLibraryError("Valid directory path should be provided.")
+        if not os.path.isdir(localPath):
+            os.makedirs(localPath)
+        self.__invalidateListing(connId)
+        result = {'transferred': [], 'renamed': [], 'deleted': [], 'unchanged': 0}
+        state = None
+        try:
+            remotePath = posixpath.join(self.__workingDir(connId), remoteDir)
+            header = {'direction': direction, 'host': self.connSettings[connId]['host'],
+                      'localDir': os.path.abspath(localPath), 'remoteDir': remotePath}
+            previous = self.__loadManifest(manifestFile, header)
+            localDirs, localFiles = self.__walkLocalTree(localPath, checksum and direction == 'upload')
+            if direction == 'upload':
+                if previous is None:
+                    self.__execute(connId, lambda conn: self.__makeRemoteDir(conn, remotePath))
+                    remoteDirs, remoteFiles = self.__execute(connId,
+                                                             lambda conn: self.__walkRemoteTree(conn, remotePath))
+                else:
+                    remoteDirs = previous['dirs']
+                    remoteFiles = previous['files']
+                # remote content, updated with every change made on server, so manifest
+                # saved after failure does not refer to files which were already moved
+                state = {'dirs': set(remoteDirs), 'files': dict(remoteFiles)}
+                self.__syncUpload(connId, localPath, remotePath, localDirs, localFiles, remoteDirs,
+                                  remoteFiles, previous, delete, checksum, workers, result, state)
+            else:
+                remoteDirs, remoteFiles = self.__execute(connId, lambda conn: self.__walkRemoteTree(conn, remotePath))
+                self.__syncDownload(connId, localPath, remotePath, localDirs, localFiles, remoteDirs,
+                                    remoteFiles, previous, delete, checksum, workers, result)
+                state = {'dirs': remoteDirs, 'files': dict((f, {'size': e['size'], 'modify': e['modify']})
+                                                           for f, e in remoteFiles.items())}
+        except ftplib.all_errors as e:
+            raise FtpLibraryError(str(e))
+        finally:
+            if manifestFile and state is not None:
+                self.__saveManifest(manifestFile, header, state['dirs'], state['files'])
+        self.__log("Transferred %d, renamed %d, deleted %d, unchanged %d file(s)" % (
+            len(result['transferred']), len(result['renamed']), len(result['deleted']), result['unchanged']))
+        return result
+
+    def __syncUpload(self, connId, localPath, remotePath, localDirs, localFiles, remoteDirs, remoteFiles,
+                     previous, delete, checksum, workers, result, state):
+        for d in sorted(set(localDirs) - set(remoteDirs)):
+            self.__execute(connId, lambda conn: self.__makeRemoteDir(conn, posixpath.join(remotePath, d)))
+            state['dirs'].add(d)
+        changed = []
+        for relPath, record in localFiles.items():
+            remote = remoteFiles.get(relPath)
+            if remote is None:
+                changed.append(relPath)
+            elif previous is not None:
+                if any(remote.get(k) != record[k] for k in record):
+                    changed.append(relPath)
+                else:
+                    result['unchanged'] += 1
+                    state['files'][relPath] = record
+            else:
+                modified = self.__modifyToEpoch(remote.get('modify'))
+                if remote.get('size') != record['size'] or (modified is not None and modified < record['mtime']):
+                    changed.append(relPath)
+                else:
+                    result['unchanged'] += 1
+                    state['files'][relPath] = record
+        # files recorded in previous manifest which only moved are renamed on server,
+        # same size and time are not enough, so sha256 of both has to be known
+        gone = [f for f in remoteFiles if f not in localFiles]
+        if previous is not None and checksum:
+            for relPath in list(changed):
+                if relPath in remoteFiles:
+                    continue
+                for oldPath in gone:
+                    if 'hash' in previous['files'][oldPath] and \
+                            all(previous['files'][oldPath].get(k) == v for k, v in localFiles[relPath].items()):
+                        self.__execute(connId, lambda conn: conn.rename(posixpath.join(remotePath, oldPath),
+                                                                        posixpath.join(remotePath, relPath)))
+                        result['renamed'].append("%s -> %s" % (oldPath, relPath))
+                        del state['files'][oldPath]
+                        state['files'][relPath] = localFiles[relPath]
+                        changed.remove(relPath)
+                        gone.remove(oldPath)
+                        break
+
+        def upload(conn, relPath):
+            # file is recorded again only when it was stored completely
+            state['files'].pop(relPath, None)
+            with open(os.path.join(localPath, *relPath.split('/')), 'rb') as localFile:
+                self.__storeFrom(conn, "STOR " + posixpath.join(remotePath, relPath), localFile, self.blocksize)
+            state['files'][relPath] = localFiles[relPath]
+
+        self.__syncTransfer(connId, changed, workers, upload, result)
+        if delete:
+            for relPath in gone:
+                self.__execute(connId, lambda conn: conn.delete(posixpath.join(remotePath, relPath)))
+                result['deleted'].append(relPath)
+                del state['files'][relPath]
+            for d in sorted(set(remoteDirs) - set(localDirs), reverse=True):
+                self.__execute(connId, lambda conn: conn.rmd(posixpath.join(remotePath, d)))
+                result['deleted'].append(d + '/')
+                state['dirs'].discard(d)
+
+    def __syncDownload(self, connId, localPath, remotePath, localDirs, localFiles, remoteDirs, remoteFiles,
+                       previous, delete, checksum, workers, result):
+        for d in sorted(set(remoteDirs) - set(localDirs)):
+            os.makedirs(os.path.join(localPath, *d.split('/')))
+        changed = []
+        for relPath, entry in remoteFiles.items():
+            local = localFiles.get(relPath)
+            modified = self.__modifyToEpoch(entry['modify'])
+            if local is None or local['size'] != entry['size'] or \
+                    (modified is not None and abs(local['mtime'] - modified) > 1):
+                changed.append(relPath)
+            else:
+                result['unchanged'] += 1
+        # files recorded in previous manifest which only moved are renamed locally,
+        # same size and time are not enough, so sha256 reported by server is compared
+        gone = [f for f in localFiles if f not in remoteFiles]
+        localHashes = {}
+        if previous is not None and checksum:
+            for relPath in list(changed):
+                if relPath in localFiles:
+                    continue
+                serverDigest = None
+                for oldPath in gone:
+                    if previous['files'].get(oldPath) != {'size': remoteFiles[relPath]['size'],
+                                                          'modify': remoteFiles[relPath]['modify']} or \
+                            localFiles[oldPath]['size'] != remoteFiles[relPath]['size']:
+                        continue
+                    if serverDigest is None:
+                        serverDigest = self.__execute(connId, lambda conn: self.__serverDigest(
+                            conn, posixpath.join(remotePath, relPath), _Checksum('sha256'))) or ''
+                    if oldPath not in localHashes:
+                        localHashes[oldPath] = self.__fileHash(os.path.join(localPath, *oldPath.split('/')))
+                    if serverDigest == localHashes[oldPath]:
+                        os.rename(os.path.join(localPath, *oldPath.split('/')),
+                                  os.path.join(localPath, *relPath.split('/')))
+                        result['renamed'].append("%s -> %s" % (oldPath, relPath))
+                        changed.remove(relPath)
+                        gone.remove(oldPath)
+                        break
+
+        def download(conn, relPath):
+            filePath = os.path.join(localPath, *relPath.split('/'))
+            with open(filePath, 'wb') as localFile:
+                self.__retrieveInto(conn, "RETR " + posixpath.join(remotePath, relPath), localFile, self.blocksize)
+            modified = self.__modifyToEpoch(remoteFiles[relPath]['modify'])
+            if modified is not None:
+                os.utime(filePath, (modified, modified))
+
+        self.__syncTransfer(connId, changed, workers, download, result)
+        if delete:
+            for relPath in gone:
+                os.remove(os.path.join(localPath, *relPath.split('/')))
+                result['deleted'].append(relPath)
+            for d in sorted(set(localDirs) - set(remoteDirs), reverse=True):
+                os.rmdir(os.path.join(localPath, *d.split('/')))
+                result['deleted'].append(d + '/')
+
+    def __syncTransfer(self, connId, changed, workers, action, result):
+        errors = []
+        if changed:
+            errors = self.__runInParallel(connId, changed, workers, action)
+        if errors:
+            raise FtpLibraryError("Failed to transfer %d file(s): %s" % (len(errors),
+                                  "; ".join("%s: %s" % e for e in errors)))
+        result['transferred'].extend(sorted(changed))
+
+    def transfer_between_connections(self, sourceFile, targetFile=None, sourceConnId='default',
+                                     targetConnId='default', mode='auto'):
+        """
+        Copies file from one FTP server to another. By default server-to-server (FXP)
+        transfer is tried first: source server is put in passive mode and target server
+        connects to it directly (PORT), so data does not go through the machine running
+        tests. If FXP is refused (many servers reject data connection to foreign
+        address) or one of connections uses secure data channel, data is piped from
+        source to target connection through a small in-memory buffer, without
+        temporary file. Returns server output of target connection.
+        Parameters:
+        - sourceFile - file name or path on source server
+        - targetFile(optional) - file name or path on target server. By default name of source file.
+        - sourceConnId(optional) - source connection identifier. By default equals 'default'
+        - targetConnId(optional) - target connection identifier. By default equals 'default'
+        - mode(optional) - 'auto', 'fxp' (fail if FXP is refused) or 'pipe'. By default 'auto'
+        Example:
+        | ftp connect | 192.168.1.10 | mylogin | mypassword | connId=staging |
+        | ftp connect | 192.168.1.20 | mylogin2 | mypassword2 | connId=target |
+        | transfer between connections | build.zip | /deploy/build.zip | staging | target |
+        """
+        sourceConn = self.__getConnection(sourceConnId)
+        targetConn = self.__getConnection(targetConnId)
+        if sourceConn is targetConn:
+            raise FtpLibraryError("Source and target connection should be different.")
+        if mode not in ('auto', 'fxp', 'pipe'):
+            raise FtpLibraryError("Mode should be 'auto', 'fxp' or 'pipe'.")
+        if targetFile == None:
+            targetFile = posixpath.basename(sourceFile)
+        self.__invalidateListing(targetConnId)
+        outputMsg = None
+        try:
+            secure = getattr(sourceConn, '_prot_p', False) or getattr(targetConn, '_prot_p', False)
+            if mode == 'fxp' or (mode == 'auto' and not secure):
+                outputMsg = self.__fxpTransfer(sourceConnId, targetConnId, sourceFile, targetFile, mode == 'fxp')
+            if outputMsg is None:
+                outputMsg = self.__pipeTransfer(self.__getConnection(sourceConnId), targetConn,
+                                                sourceFile, targetFile)
+        except ftplib.all_errors as e:
+            raise FtpLibraryError(str(e))
+        self.__log(outputMsg)
+        return outputMsg
+
+    def __fxpTransfer(self, sourceConnId, targetConnId, sourceFile, targetFile, required):
+        # returns None when servers refuse data connection between them
+        sourceConn = self.__getConnection(sourceConnId)
+        targetConn = self.__getConnection(targetConnId)
+        sourceDir = self.__workingDir(sourceConnId)
+        sourceConn.voidcmd("TYPE I")
+        targetConn.voidcmd("TYPE I")
+        self.__useCompression(sourceConn, False)
+        self.__useCompression(targetConn, False)
+        try:
+            host, port = sourceConn.makepasv()
+            targetConn.sendport(host, port)
+            targetConn.sendcmd("STOR " + targetFile)
+        except (ftplib.error_perm, ftplib.error_temp) as e:
+            if required or (isinstance(e, ftplib.error_temp) and not str(e).startswith('425')):
+                raise
+            logger.info("FXP refused (%s), piping data through this host" % e)
+            return None
+        try:
+            sourceConn.sendcmd("RETR " + sourceFile)
+            sourceConn.voidresp()
+        except ftplib.error_temp as e:
+            if not str(e).startswith('425'):
+                targetConn.abort()
+                raise
+            # source rejected data connection from target server with unsolicited reply.
+            # Its RETR still waits for data connection and not every server forgets it
+            # on ABOR, so source connection is opened again. Replies of aborted STOR
+            # are skipped on target connection.
+            self.__reconnect(sourceConnId, sourceDir)
+            self.__resyncControl(targetConn)
+            try:
+                targetConn.delete(targetFile)
+            except ftplib.error_perm:
+                pass
+            if required:
+                raise
+            logger.info("FXP refused (%s), piping data through this host" % e)
+            return None
+        except ftplib.all_errors:
+            # target waits for data which will not come
+            targetConn.abort()
+            raise
+        return targetConn.voidresp()
+
+    def __resyncControl(self, thisConn):
+        # aborts pending transfer and skips its replies: ABOR and NOOP are sent
+        # together and replies are read up to the one answering NOOP. Some servers
+        # report end of aborted transfer only after that, so NOOP is sent once more.
+        thisConn.putcmd("ABOR")
+        for attempt in range(2):
+            thisConn.putcmd("NOOP")
+            for i in range(10):
+                try:
+                    if thisConn.getresp().startswith('200'):
+                        break
+                except (ftplib.error_temp, ftplib.error_perm, ftplib.error_reply):
+                    pass
+
+    def __pipeTransfer(self, sourceConn, targetConn, sourceFile, targetFile):
+        pipe = _Pipe(16)
+        failure = []
+
+        def retrieve():
+            try:
+                self.__retrieveInto(sourceConn, "RETR " + sourceFile, pipe, self.blocksize)
+            except FtpLibraryError as e:
+                # pipe was closed by failed store, read reply for aborted transfer
+                try:
+                    sourceConn.voidresp()
+                except ftplib.all_errors:
+                    pass
+                failure.append(e)
+            except Exception as e:
+                failure.append(e)
+            finally:
+                pipe.finish()
+
+        reader = threading.Thread(target=retrieve)
+        reader.daemon = True
+        reader.start()
+        # target file is not created when source cannot be read
+        pipe.ready.wait()
+        if failure:
+            reader.join()
+            raise failure[0]
+        try:
+            outputMsg = self.__storeFrom(targetConn, "STOR " + targetFile, pipe, self.blocksize)
+        finally:
+            pipe.cancel()
+            reader.join()
+        if failure:
+            raise failure[0]
+        return outputMsg
+
+    def start_download(self, remoteFileName, localFilePath=None, connId='default'):
+        """
+        Starts downloading file from current directory on FTP server in background
+        and returns transfer handle. Transfer uses its own connection opened with the
+        same settings as given connection, so the connection can be used by other
+        keywords in the meantime. Use `Wait For Transfer` to get result.
+        Parameters are the same as for `Download File`:
+        - remoteFileName - file name on FTP server
+        - localFilePath (optional) - local file name or path where remote file should be saved.
+        - connId(optional) - connection identifier. By default equals 'default'
+        Example:
+        | ${handle}= | start download | firmware.bin | D:/rfftppy/tmp |
+        | upload file | config.ini | connId=ftp2 |
+        | wait for transfer | ${handle} | timeout=600 |
+        """
+        self.__getConnection(connId)
+        localPath = self.__downloadPath(remoteFileName, localFilePath)
+        try:
+            remotePath = posixpath.join(self.__workingDir(connId), remoteFileName)
+        except ftplib.all_errors as e:
+            raise FtpLibraryError(str(e))
+
+        def download(conn, transfer):
+            try:
+                conn.voidcmd("TYPE I")
+                transfer.total = conn.size(remotePath)
+            except ftplib.error_perm:
+                pass
+            with open(localPath, 'wb') as localFile:
+                return self.__retrieveInto(conn, "RETR " + remotePath, localFile, self.blocksize,
+                                           onBlock=transfer.addProgress)
+
+        return self.__startTransfer(connId, "download %s" % remotePath, download)
+
+    def start_upload(self, localFileName, remoteFileName=None, connId='default'):
+        """
+        Starts sending file from local drive to current directory on FTP server in
+        background and returns transfer handle. Transfer uses its own connection
+        opened with the same settings as given connection, so the connection can be
+        used by other keywords in the meantime. Use `Wait For Transfer` to get result.
+        Parameters are the same as for `Upload File`:
+        - localFileName - file name or path to a file on a local drive.
+        - remoteFileName (optional) - a name or path containing name under which file should be saved.
+        - connId(optional) - connection identifier. By default equals 'default'
+        Example:
+        | ${handle}= | start upload | D:/rfftppy/image.iso |
+        | ${progress}= | get transfer progress | ${handle} |
+        | wait for transfer | ${handle} |
+        """
+        self.__getConnection(connId)
+        localFilePath = os.path.normpath(localFileName)
+        if not os.path.isfile(localFilePath):
+            raise FtpLibraryError("Valid file path should be provided.")
+        if remoteFileName == None:
+            remoteFileName = os.path.split(localFileName)[1]
+        self.__invalidateListing(connId)
+        try:
+            remotePath = posixpath.join(self.__workingDir(connId), remoteFileName)
+        except ftplib.all_errors as e:
+            raise FtpLibraryError(str(e))
+
+        def upload(conn, transfer):
+            transfer.total = os.path.getsize(localFilePath)
+            with open(localFilePath, "rb") as localFile:
+                return self.__storeFrom(conn, "STOR " + remotePath, localFile, self.blocksize,
+                                        onBlock=transfer.addProgress)
+
+        return self.__startTransfer(connId, "upload %s" % remotePath, upload)
+
+    def __startTransfer(self, connId, description, action):
+        self.transferCounter += 1
+        handle = "transfer%d" % self.transferCounter
+        transfer = _BackgroundTransfer(description, lambda t: self.__runTransfer(connId, action, t))
+        self.transfers[handle] = transfer
+        transfer.start()
+        self.__log("Started %s as %s" % (description, handle))
+        return handle
+
+    def __runTransfer(self, connId, action, transfer):
+        conn = self.__cloneConnection(connId)
+        try:
+            return action(conn, transfer)
+        finally:
+            try:
+                conn.quit()
+            except ftplib.all_errors:
+                conn.close()
+
+    def __getTransfer(self, handle):
+        if handle in self.transfers:
+            return self.transfers[handle]
+        raise FtpLibraryError("Transfer with handle %s does not exist." % handle)
+
+    def wait_for_transfer(self, handle, timeout=None):
+        """
+        Waits until background transfer started by `Start Download` or `Start Upload`
+        is finished. Returns server output. Fails if transfer failed or if it was not
+        finished within timeout (the transfer keeps running in that case).
+        Parameters:
+        - handle - transfer handle
+        - timeout(optional) - maximal waiting time in seconds. By default no limit.
+        Example:
+        | wait for transfer | ${handle} | timeout=60 |
+        """
+        transfer = self.__getTransfer(handle)
+        transfer.join(None if timeout in (None, '') else float(timeout))
+        if transfer.is_alive():
+            raise FtpLibraryError("Transfer %s not finished within %s seconds." % (handle, timeout))
+        self.transfers.pop(handle)
+        if transfer.error is not None:
+            raise FtpLibraryError(str(transfer.error))
+        outputMsg = str(transfer.result)
+        self.__log(outputMsg)
+        return outputMsg
+
+    def get_transfer_progress(self, handle):
+        """
+        Returns dictionary describing background transfer: transferred (bytes),
+        total (bytes, None if unknown), percent (None if unknown), done (True/False)
+        and error (None or error message).
+        Parameters:
+        - handle - transfer handle returned by `Start Download` or `Start Upload`
+        Example:
+        | ${progress}= | get transfer progress | ${handle} |
+        | Log | ${progress}[percent] |
+        """
+        transfer = self.__getTransfer(handle)
+        total = transfer.total
+        outputMsg = {'transferred': transfer.transferred, 'total': total,
+                     'percent': 100.0 * transfer.transferred / total if total else None,
+                     'done': not transfer.is_alive(),
+                     'error': None if transfer.error is None else str(transfer.error)}
+        self.__log("%s: %s" % (transfer.description, outputMsg))
+        return outputMsg
+
+    def upload_bytes(self, data, remoteFileName, connId='default', maxSize=10485760):
+        """
+        Sends given bytes to current directory on FTP server in binary mode, without
+        creating a local file. Returns server output.
+        Parameters:
+        - data - bytes to be sent. Unicode string is converted character by character,
+          so it can contain only characters with codes 0-255. Use `Upload Text` for text.
+        - remoteFileName - a name or path containing name under which data should be saved.
+        - connId(optional) - connection identifier. By default equals 'default'
+        - maxSize(optional) - maximal allowed data size in bytes. By default 10485760
+        Example:
+        | ${payload}= | Convert To Bytes | 00 01 02 | hex |
+        | upload bytes | ${payload} | payload.bin |
+        """
+        thisConn = self.__getConnection(connId)
+        outputMsg = ""
+        if not isinstance(data, (bytes, bytearray)):
+            try:
+                data = data.encode('latin-1')
+            except (AttributeError, UnicodeEncodeError):
+                raise FtpLibraryError("Data should be bytes or string of characters with codes 0-255, "
+                                      "use Upload Text to send text in other encoding.")
+        if len(data) > int(maxSize):
+            raise FtpLibraryError("Data size %d exceeds maximal size %s." % (len(data), maxSize))
+        self.__invalidateListing(connId)
+        try:
+            outputMsg += self.__execute(connId, lambda conn: self.__storeFrom(
+                conn, "STOR " + remoteFileName, io.BytesIO(data), self.blocksize))
+        except ftplib.all_errors as e:
+            raise FtpLibraryError(str(e))
+        self.__log(outputMsg)
         return outputMsg
 
+    def download_bytes(self, remoteFileName, connId='default', maxSize=10485760):
+        """
+        Downloads file from current directory on FTP server in binary mode and returns
+        its content as bytes, without creating a local file.
+        Parameters:
+        - remoteFileName - file name or path on FTP server
+        - connId(optional) - connection identifier. By default equals 'default'
+        - maxSize(optional) - maximal allowed file size in bytes. Transfer is aborted
+          when more data is received. By default 10485760
+        Example:
+        | ${content}= | download bytes | payload.bin |
+        """
+        thisConn = self.__getConnection(connId)
+        outputMsg = ""
+        buf = _BoundedBuffer(int(maxSize))
+
+        def download(conn):
+            buf.seek(0)
+            buf.truncate()
+            return self.__retrieveInto(conn, "RETR " + remoteFileName, buf, self.blocksize)
+
+        try:
+            outputMsg += self.__execute(connId, download)
+        except FtpLibraryError:
+            # data connection was closed early, read reply for aborted transfer
+            try:
+                self.__getConnection(connId).voidresp()
+            except ftplib.all_errors:
+                pass
+            raise
+        except ftplib.all_errors as e:
+            raise FtpLibraryError(str(e))
+        self.__log(outputMsg)
+        return buf.getvalue()
+
+    def upload_text(self, text, remoteFileName, encoding='UTF-8', connId='default', maxSize=10485760):
+        """
+        Sends given text to current directory on FTP server, without creating a local
+        file. Text is encoded with given encoding and sent in binary mode.
+        Returns server output.
+        Parameters:
+        - text - text to be sent
+        - remoteFileName - a name or path containing name under which text should be saved.
+        - encoding(optional) - text encoding. By default UTF-8
+        - connId(optional) - connection identifier. By default equals 'default'
+        - maxSize(optional) - maximal allowed encoded size in bytes. By default 10485760
+        Example:
+        | upload text | key=value | config.ini |
+        | upload text | ${polishText} | pl.txt | encoding=cp1250 |
+        """
+        return self.upload_bytes(text.encode(encoding), remoteFileName, connId, maxSize)
+
+    def download_text(self, remoteFileName, encoding='UTF-8', connId='default', maxSize=10485760):
+        """
+        Downloads file from current directory on FTP server and returns its content
+        decoded with given encoding, without creating a local file.
+        Parameters:
+        - remoteFileName - file name or path on FTP server
+        - encoding(optional) - text encoding. By default UTF-8
+        - connId(optional) - connection identifier. By default equals 'default'
+        - maxSize(optional) - maximal allowed file size in bytes. By default 10485760
+        Example:
+        | ${content}= | download text | config.ini |
+        | Should Contain | ${content} | key=value |
+        """
+        return self.download_bytes(remoteFileName, connId, maxSize).decode(encoding)
+
     def size(self, fileToCheck, connId='default'):
         """
         Checks size of a file on FTP server. Returns size of a file in bytes (integer).
@@ -429,14 +2186,68 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         thisConn = self.__getConnection(connId)
         outputMsg = ""
         try:
-            tmpSize = thisConn.size(fileToCheck)
+            tmpSize = self.__execute(connId, lambda conn: conn.size(fileToCheck))
             outputMsg += str(tmpSize)
         except ftplib.all_errors as e:
             raise FtpLibraryError(str(e))
-        if self.printOutput:
-            logger.info(outputMsg)
+        self.__log(outputMsg)
         return outputMsg
 
+    def wait_for_remote_file(self, remoteFile, timeout=60, minSize=0, stableTime=0, maxInterval=5,
+                             connId='default'):
+        """
+        Waits until file exists on FTP server. Optionally waits also until file has at
+        least given size and until its size (and modification time, if server supports
+        MDTM) does not change for given time. File is checked with SIZE command over
+        given connection; checks are frequent at the beginning and become rarer (up to
+        maxInterval) while nothing changes. Failed checks are not logged.
+        Returns size of a file in bytes (integer). Fails if condition is not met within timeout.
+        Parameters:
+        - remoteFile - file name or path to a file on FTP server
+        - timeout(optional) - maximal waiting time in seconds. By default 60
+        - minSize(optional) - minimal size of a file in bytes. By default 0
+        - stableTime(optional) - time in seconds for which size must not change. By default 0
+        - maxInterval(optional) - maximal time in seconds between checks. By default 5
+        - connId(optional) - connection identifier. By default equals 'default'
+        Examples:
+        | wait for remote file | /logs/device.log |  |  |
+        | wait for remote file | dump.bin | timeout=300 | minSize=1048576 |
+        | ${size}= | wait for remote file | report.xml | stableTime=5 |
+        """
+        self.__getConnection(connId)
+        timeout = float(timeout)
+        minSize = int(minSize)
+        stableTime = float(stableTime)
+        maxInterval = float(maxInterval)
+        deadline = time.time() + timeout
+        interval = 0.2
+        lastState = None
+        lastChange = time.time()
+        probe = _FileProbe(remoteFile, stableTime > 0)
+        while True:
+            try:
+                state = self.__execute(connId, probe.check)
+            except ftplib.all_errors as e:
+                raise FtpLibraryError(str(e))
+            now = time.time()
+            if state != lastState:
+                lastState = state
+                lastChange = now
+                interval = 0.2
+            size = state[0] if state is not None else None
+            if size is not None and size >= minSize and now - lastChange >= stableTime:
+                break
+            if now >= deadline:
+                raise FtpLibraryError("File %s not ready within %s seconds (last size: %s)." %
+                                      (remoteFile, timeout, size))
+            interval = min(interval * 1.5, maxInterval)
+            if size is not None and stableTime > 0:
+                # do not oversleep moment when file becomes stable
+                interval = min(interval, max(0.2, lastChange + stableTime - now))
+            time.sleep(max(0, min(interval, deadline - now)))
+        self.__log("File %s ready, size %d" % (remoteFile, size))
+        return size
+
     def rename(self, targetFile, newName, connId='default'):
         """
         Renames (actually moves) file on FTP server. Returns server output.
@@ -449,12 +2260,12 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         """
         thisConn = self.__getConnection(connId)
         outputMsg = ""
+        self.__invalidateListing(connId)
         try:
-            outputMsg += str(thisConn.rename(targetFile, newName))
+            outputMsg += str(self.__execute(connId, lambda conn: conn.rename(targetFile, newName)))
         except ftplib.all_errors as e:
             raise FtpLibraryError(str(e))
-        if self.printOutput:
-            logger.info(outputMsg)
+        self.__log(outputMsg)
         return outputMsg
 
     def delete(self, targetFile, connId='default'):
@@ -466,12 +2277,12 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         """
         thisConn = self.__getConnection(connId)
         outputMsg = ""
+        self.__invalidateListing(connId)
         try:
-            outputMsg += str(thisConn.delete(targetFile))
+            outputMsg += str(self.__execute(connId, lambda conn: conn.delete(targetFile)))
         except ftplib.all_errors as e:
             raise FtpLibraryError(str(e))
-        if self.printOutput:
-            logger.info(outputMsg)
+        self.__log(outputMsg)
         return outputMsg
 
     def send_cmd(self, command, connId='default'):
@@ -485,14 +2296,118 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         """
         thisConn = self.__getConnection(connId)
         outputMsg = ""
+        self.__invalidateListing(connId)
         try:
-            outputMsg += str(thisConn.sendcmd(command))
+            outputMsg += str(self.__execute(connId, lambda conn: conn.sendcmd(command)))
         except ftplib.all_errors as e:
             raise FtpLibraryError(str(e))
-        if self.printOutput:
-            logger.info(outputMsg)
+        finally:
+            # command could change working directory
+            self.workingDirs.pop(connId, None)
+        self.__log(outputMsg)
         return outputMsg
 
+    def get_ftp_statistics(self, connId=None):
+        """
+        Returns dictionary with statistics collected for given connection since it
+        was first opened (also after it was closed). Statistics of worker connections
+        opened by parallel keywords are included in their source connection.
+        If connId is not given, returns dictionary of statistics of all connections.
+        Statistics keys:
+        - connections, connectTime - number of logins and total time of connect, login
+          and TLS handshake (seconds)
+        - commands, commandTime, averageCommandLatency, maxCommandLatency - control
+          commands, including those used to open data connections
+        - dataConnections, dataSetupTime, averageDataSetupTime - data connections
+        - bytesReceived, bytesSent, transferTime, throughput - data transferred by
+          file and bytes keywords, throughput in bytes per second
+        Parameters:
+        - connId(optional) - connection identifier.
+        Example:
+        | ${stats}= | get ftp statistics | ftp1 |
+        | Should Be True | ${stats}[averageCommandLatency] < 0.5 |
+        """
+        if connId is None:
+            return dict((k, v.asDict()) for k, v in self.ftpStatistics.items())
+        if connId not in self.ftpStatistics:
+            raise FtpLibraryError("Connection with ID %s does not exist. It should be created before this step." % connId)
+        outputMsg = self.ftpStatistics[connId].asDict()
+        self.__log(str(outputMsg))
+        return outputMsg
+
+    def save_ftp_statistics(self, filePath):
+        """
+        Saves statistics of all connections (see `Get Ftp Statistics`) to a JSON file.
+        Parameters:
+        - filePath - local file path
+        Example:
+        | save ftp statistics | ${OUTPUT DIR}/ftp_statistics.json |
+        """
+        with open(filePath, 'w') as f:
+            json.dump(self.get_ftp_statistics(), f, indent=1, sort_keys=True)
+
+    def _end_suite(self, name, attrs):
+        # library listener, statistics are saved only when statisticsFile is given during import
+        if not self.statisticsFile or not self.ftpStatistics:
+            return
+        results = {}
+        if os.path.isfile(self.statisticsFile):
+            try:
+                with open(self.statisticsFile) as f:
+                    results = json.load(f)
+            except ValueError:
+                results = {}
+        results[attrs['longname']] = self.get_ftp_statistics()
+        with open(self.statisticsFile, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+
+    def set_retry_policy(self, attempts=1, backoff=1, codes='421,425,426,450,451'):
+        """
+        Sets how keywords handle transient failures. When a command or transfer fails
+        because of connection problem or server reply with one of given codes, the
+        connection is reopened with the same settings, working directory (tracked by
+        `Cwd`) is restored and operation is repeated. Waiting time before retry grows
+        exponentially (backoff, 2 x backoff, 4 x backoff...) with random jitter.
+        Worker connections of parallel keywords retry failed files the same way.
+        Note that a command repeated after lost reply (e.g. `Mkd`) may fail because the
+        first attempt actually succeeded.
+        Parameters:
+        - attempts(optional) - maximal number of attempts, 1 disables retrying. By default 1
+        - backoff(optional) - waiting time in seconds before the first retry. By default 1
+        - codes(optional) - comma separated reply codes to retry. By default 421,425,426,450,451
+        Example:
+        | set retry policy | 5 | 0.5 |
+        | set retry policy | attempts=3 | codes=421,425,426,450,451,530 |
+        """
+        self.retryAttempts = max(1, int(attempts))
+        self.retryBackoff = float(backoff)
+        if isinstance(codes, (list, tuple)):
+            codes = ",".join(str(c) for c in codes)
+        self.retryCodes = [c.strip() for c in str(codes).split(',') if c.strip()]
+
+    def set_log_policy(self, policy='full', maxLines=100):
+        """
+        Sets how much of server output keywords log (only when logging is enabled
+        during library import):
+        - full - whole output is logged on INFO level
+        - truncate - only first maxLines lines are logged, followed by number of skipped lines
+        - summary - only first line of server reply or number of lines of listings is logged
+        - debug - whole output is logged on DEBUG level, so it is visible only with
+          --loglevel DEBUG
+        Large listings can also be saved directly to a file, see `Dir`.
+        Parameters:
+        - policy(optional) - full, truncate, summary or debug. By default full
+        - maxLines(optional) - number of lines logged with truncate policy. By default 100
+        Example:
+        | set log policy | truncate | 20 |
+        | set log policy | summary |  |
+        """
+        policy = str(policy).lower()
+        if policy not in ('full', 'truncate', 'summary', 'debug'):
+            raise FtpLibraryError("Log policy should be 'full', 'truncate', 'summary' or 'debug'.")
+        self.logPolicy = policy
+        self.logMaxLines = max(0, int(maxLines))
+
     def ftp_close(self, connId='default'):
         """
         Closes FTP connection. Returns None.
@@ -500,6 +2415,11 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
         - connId(optional) - connection identifier. By default equals 'default'
         """
         thisConn = self.__getConnection(connId)
+        if connId in self.pooledConnections:
+            key, home = self.pooledConnections.pop(connId)
+            self.__removeConnection(connId)
+            _connectionPool.release(key, thisConn, home)
+            return
         try:
             thisConn.quit()
             self.__removeConnection(connId)
@@ -510,9 +2430,423 @@ To run library remotely execute: python FtpLibrary.py <ipaddress> <portnumber>
             except ftplib.all_errors as x:
                 raise FtpLibraryError(str(x))
 
+    def _close(self):
+        # library listener, returns connections left open to the pool
+        for connId in list(self.pooledConnections):
+            self.ftp_close(connId)
+
     def __del__(self):
         self.ftpList = {}
 
+class _FtpStatistics(object):
+    # counters shared by a connection and its worker connections
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.connectTime = 0.0
+        self.commands = 0
+        self.commandTime = 0.0
+        self.maxCommandLatency = 0.0
+        self.dataConnections = 0
+        self.dataSetupTime = 0.0
+        self.bytesReceived = 0
+        self.bytesSent = 0
+        self.transferTime = 0.0
+
+    def addConnection(self, elapsed):
+        with self.lock:
+            self.connections += 1
+            self.connectTime += elapsed
+
+    def addCommand(self, elapsed):
+        with self.lock:
+            self.commands += 1
+            self.commandTime += elapsed
+            self.maxCommandLatency = max(self.maxCommandLatency, elapsed)
+
+    def addDataConnection(self, elapsed):
+        with self.lock:
+            self.dataConnections += 1
+            self.dataSetupTime += elapsed
+
+    def addTransfer(self, received, sent, elapsed):
+        with self.lock:
+            self.bytesReceived += received
+            self.bytesSent += sent
+            self.transferTime += elapsed
+
+    def asDict(self):
+        with self.lock:
+            transferred = self.bytesReceived + self.bytesSent
+            return {'connections': self.connections,
+                    'connectTime': self.connectTime,
+                    'commands': self.commands,
+                    'commandTime': self.commandTime,
+                    'averageCommandLatency': self.commandTime / self.commands if self.commands else 0.0,
+                    'maxCommandLatency': self.maxCommandLatency,
+                    'dataConnections': self.dataConnections,
+                    'dataSetupTime': self.dataSetupTime,
+                    'averageDataSetupTime': self.dataSetupTime / self.dataConnections if self.dataConnections else 0.0,
+                    'bytesReceived': self.bytesReceived,
+                    'bytesSent': self.bytesSent,
+                    'transferTime': self.transferTime,
+                    'throughput': transferred / self.transferTime if self.transferTime else 0.0}
+
+class _StatisticsMixin(object):
+    # times control commands and data connection setup of ftplib connection
+    statistics = None
+
+    def sendcmd(self, cmd):
+        start = time.time()
+        try:
+            return super(_StatisticsMixin, self).sendcmd(cmd)
+        finally:
+            if self.statistics is not None:
+                self.statistics.addCommand(time.time() - start)
+
+    def voidcmd(self, cmd):
+        start = time.time()
+        try:
+            return super(_StatisticsMixin, self).voidcmd(cmd)
+        finally:
+            if self.statistics is not None:
+                self.statistics.addCommand(time.time() - start)
+
+    def ntransfercmd(self, cmd, rest=None):
+        start = time.time()
+        result = super(_StatisticsMixin, self).ntransfercmd(cmd, rest)
+        if self.statistics is not None:
+            self.statistics.addDataConnection(time.time() - start)
+        return result
+
+class _CompressionMixin(object):
+    # decompresses text listings when MODE Z is active
+    compression = False
+    modeZ = False
+
+    def retrlines(self, cmd, callback=None):
+        if not self.modeZ:
+            return super(_CompressionMixin, self).retrlines(cmd, callback)
+        if callback is None:
+            callback = ftplib.print_line
+        self.sendcmd("TYPE A")
+        decompressor = zlib.decompressobj()
+        pending = b''
+        conn = self.transfercmd(cmd)
+        try:
+            while True:
+                data = conn.recv(8192)
+                if not data:
+                    break
+                lines = (pending + decompressor.decompress(data)).split(b'\n')
+                pending = lines.pop()
+                for line in lines:
+                    callback(line.rstrip(b'\r').decode(self.encoding))
+            pending += decompressor.flush()
+            if pending:
+                callback(pending.rstrip(b'\r').decode(self.encoding))
+            if ssl is not None and isinstance(conn, ssl.SSLSocket):
+                conn.unwrap()
+        finally:
+            conn.close()
+        return self.voidresp()
+
+class _Ftp(_CompressionMixin, _StatisticsMixin, ftplib.FTP):
+    pass
+
+class _TlsSessionMixin(object):
+    # wraps secure data connections reusing TLS session of control connection
+    def ntransfercmd(self, cmd, rest=None):
+        conn, size = ftplib.FTP.ntransfercmd(self, cmd, rest)
+        if self._prot_p:
+            session = getattr(self.sock, 'session', None)
+            if session is not None:
+                conn = self.context.wrap_socket(conn, server_hostname=self.host, session=session)
+            else:
+                conn = self.context.wrap_socket(conn, server_hostname=self.host)
+        return conn, size
+
+class _FtpTls(_CompressionMixin, _StatisticsMixin, _TlsSessionMixin, ftplib.FTP_TLS):
+    pass
+
+class _SslContexts(object):
+    # SSL contexts shared by all TLS connections, one per configuration
+    VERSIONS = {'1': 'TLSv1', '1.0': 'TLSv1', '1.1': 'TLSv1_1', '1.2': 'TLSv1_2', '1.3': 'TLSv1_3'}
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.contexts = {}
+
+    def get(self, caFile=None, certFile=None, keyFile=None, tlsVersion=None):
+        key = (caFile, certFile, keyFile, None if tlsVersion is None else str(tlsVersion))
+        with self.lock:
+            if key not in self.contexts:
+                self.contexts[key] = self.__create(*key)
+            return self.contexts[key]
+
+    def __create(self, caFile, certFile, keyFile, tlsVersion):
+        try:
+            context = ssl.create_default_context(cafile=caFile)
+            if caFile is None:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            if certFile is not None:
+                context.load_cert_chain(certFile, keyFile)
+        except (IOError, ssl.SSLError) as e:
+            raise FtpLibraryError("Cannot create SSL context: %s" % e)
+        if tlsVersion is not None:
+            version = self.VERSIONS.get(tlsVersion.lower().replace('tlsv', '').replace('_', '.'))
+            if version is None:
+                raise FtpLibraryError("TLS version should be one of: 1, 1.1, 1.2, 1.3.")
+            context.minimum_version = getattr(ssl.TLSVersion, version)
+        return context
+
+_sslContexts = _SslContexts()
+
+class _BackgroundTransfer(threading.Thread):
+    # runs function(transfer) in background keeping its result or error
+    def __init__(self, description, function):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.description = description
+        self.function = function
+        self.total = None
+        self.transferred = 0
+        self.result = None
+        self.error = None
+
+    def addProgress(self, block):
+        self.transferred += len(block)
+
+    def run(self):
+        try:
+            self.result = self.function(self)
+        except Exception as e:
+            self.error = e
+
+class _Checksum(object):
+    # incrementally updated md5, sha1, sha256 or crc32 digest
+    SERVER_NAMES = {'md5': ('MD5', 'XMD5'), 'sha1': ('SHA-1', 'XSHA1'),
+                    'sha256': ('SHA-256', 'XSHA256'), 'crc32': ('CRC32', 'XCRC')}
+
+    def __init__(self, algorithm):
+        self.algorithm = str(algorithm).lower().replace('-', '')
+        if self.algorithm not in self.SERVER_NAMES:
+            raise FtpLibraryError("Checksum should be one of: md5, sha1, sha256, crc32.")
+        self.hashName, self.xCommand = self.SERVER_NAMES[self.algorithm]
+        self.reset()
+
+    def reset(self):
+        if self.algorithm == 'crc32':
+            self.crc = 0
+        else:
+            self.hash = hashlib.new(self.algorithm)
+
+    def update(self, data):
+        if self.algorithm == 'crc32':
+            self.crc = zlib.crc32(data, self.crc) & 0xffffffff
+        else:
+            self.hash.update(data)
+
+    def updateFromFile(self, path, length, blocksize):
+        with open(path, 'rb') as localFile:
+            while length > 0:
+                data = localFile.read(min(length, blocksize))
+                if not data:
+                    break
+                self.update(data)
+                length -= len(data)
+
+    def hexdigest(self):
+        if self.algorithm == 'crc32':
+            return "%08x" % self.crc
+        return self.hash.hexdigest()
+
+    def parseReply(self, reply, hashCommand=False):
+        # returns lower case hex digest found in server reply, or None. HASH reply is
+        # "213 <algorithm> <start>-<end> <digest> <file name>", XCRC/XMD5/XSHA* reply ends with digest
+        tokens = reply.split()
+        token = None
+        if hashCommand:
+            if len(tokens) > 3 and re.match(r'^\d+-\d+$', tokens[2]):
+                token = tokens[3]
+        elif len(tokens) > 1:
+            token = tokens[-1]
+        length = 8 if self.algorithm == 'crc32' else len(self.hexdigest())
+        if token is None or not re.match(r'^[0-9a-fA-F]+$', token) or len(token) > length:
+            return None
+        if self.algorithm != 'crc32' and len(token) != length:
+            return None
+        return token.lower().zfill(length)
+
+class _ConnectionPool(object):
+    # process-wide pool of logged in connections, keyed by connection settings
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.idle = {}
+        self.factories = {}
+        self.keepaliveInterval = None
+        self.keepaliveThread = None
+
+    def acquire(self, key, factory, keepaliveInterval):
+        # returns (connection, server output, home directory)
+        with self.lock:
+            self.factories[key] = factory
+            if self.keepaliveInterval is None or keepaliveInterval < self.keepaliveInterval:
+                self.keepaliveInterval = keepaliveInterval
+        while True:
+            with self.lock:
+                entries = self.idle.get(key)
+                entry = entries.pop() if entries else None
+            if entry is None:
+                return self.__open(factory)
+            conn, home, lastUsed = entry
+            try:
+                outputMsg = conn.voidcmd("NOOP")
+                return conn, "Reused pooled connection: " + outputMsg, home
+            except ftplib.all_errors:
+                conn.close()
+
+    def release(self, key, conn, home):
+        conn.statistics = None
+        try:
+            if getattr(conn, '_prot_p', False):
+                conn.prot_c()
+            conn.cwd(home)
+        except ftplib.all_errors:
+            conn.close()
+            return
+        with self.lock:
+            self.idle.setdefault(key, []).append((conn, home, time.time()))
+            if self.keepaliveThread is None and self.keepaliveInterval > 0:
+                self.keepaliveThread = threading.Thread(target=self.__keepalive)
+                self.keepaliveThread.daemon = True
+                self.keepaliveThread.start()
+
+    def __open(self, factory):
+        conn, outputMsg = factory()
+        try:
+            return conn, outputMsg, conn.pwd()
+        except ftplib.all_errors:
+            conn.close()
+            raise
+
+    def __keepalive(self):
+        while True:
+            time.sleep(self.keepaliveInterval)
+            now = time.time()
+            due = []
+            with self.lock:
+                for key, entries in self.idle.items():
+                    for entry in [e for e in entries if now - e[2] >= self.keepaliveInterval]:
+                        entries.remove(entry)
+                        due.append((key, entry))
+            for key, (conn, home, lastUsed) in due:
+                try:
+                    conn.voidcmd("NOOP")
+                except ftplib.all_errors:
+                    conn.close()
+                    # stale connection is replaced, so next acquire does not pay for login
+                    try:
+                        conn, outputMsg, home = self.__open(self.factories[key])
+                        conn.statistics = None
+                    except ftplib.all_errors:
+                        continue
+                with self.lock:
+                    self.idle.setdefault(key, []).append((conn, home, time.time()))
+
+_connectionPool = _ConnectionPool()
+
+class _Pipe(io.RawIOBase):
+    # bounded in-memory queue of blocks written by one thread and read by another
+    def __init__(self, maxBlocks):
+        io.RawIOBase.__init__(self)
+        self.blocks = queue.Queue(maxBlocks)
+        self.pending = b''
+        self.cancelled = False
+        self.finished = False
+        self.ready = threading.Event()
+
+    def readable(self):
+        return True
+
+    def write(self, data):
+        self.__put(bytes(data))
+        return len(data)
+
+    def finish(self):
+        # marks end of data for reader
+        try:
+            self.__put(None)
+        except FtpLibraryError:
+            pass
+
+    def cancel(self):
+        # stops writer, e.g. because reader failed
+        self.cancelled = True
+
+    def __put(self, block):
+        while True:
+            if self.cancelled:
+                raise FtpLibraryError("Transfer aborted because target failed.")
+            try:
+                self.blocks.put(block, timeout=0.5)
+                self.ready.set()
+                return
+            except queue.Full:
+                pass
+
+    def readinto(self, buf):
+        if not self.pending:
+            if self.finished:
+                return 0
+            block = self.blocks.get()
+            if block is None:
+                self.finished = True
+                return 0
+            self.pending = block
+        count = min(len(buf), len(self.pending))
+        buf[:count] = self.pending[:count]
+        self.pending = self.pending[count:]
+        return count
+
+class _FileProbe(object):
+    # checks (size, modification time) of remote file, None if it does not exist
+    def __init__(self, remoteFile, withModify):
+        self.remoteFile = remoteFile
+        self.withModify = withModify
+        self.binaryConn = None
+
+    def check(self, conn):
+        if conn is not self.binaryConn:
+            # SIZE is refused in ASCII mode by some servers, set once per connection
+            conn.voidcmd("TYPE I")
+            self.binaryConn = conn
+        try:
+            size = conn.size(self.remoteFile)
+        except ftplib.error_perm as e:
+            if str(e)[:3] == '550':
+                return None
+            raise
+        modify = None
+        if self.withModify:
+            try:
+                modify = conn.sendcmd("MDTM " + self.remoteFile)
+            except ftplib.error_perm:
+                self.withModify = False
+        return size, modify
+
+class _BoundedBuffer(io.BytesIO):
+    # in-memory file refusing to grow over maxSize bytes
+    def __init__(self, maxSize):
+        io.BytesIO.__init__(self)
+        self.maxSize = maxSize
+
+    def write(self, data):
+        if self.tell() + len(data) > self.maxSize:
+            raise FtpLibraryError("Received data exceeds maximal size %d." % self.maxSize)
+        return io.BytesIO.write(self, data)
+
 class FtpLibraryError(Exception):
     def __init__(self,msg):
         self.msg = msg
@@ -520,11 +2854,112 @@ class FtpLibraryError(Exception):
     def __str__(self):
         return self.msg
 
+class _RemoteRequestHandler(SimpleXMLRPCRequestHandler):
+    # accepts any URL path, client address and path select library instance
+    rpc_paths = ()
+
+    def do_POST(self):
+        self.server.current.namespace = "%s%s" % (self.client_address[0], self.path)
+        SimpleXMLRPCRequestHandler.do_POST(self)
+
+class _ConcurrentRemoteServer(ThreadingMixIn, SimpleXMLRPCServer):
+    # remote server handling each request in its own thread, with separate
+    # FtpLibrary instance (and lock) for every client namespace
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host, port, idleTimeout=3600):
+        from robotremoteserver import KeywordResult, RemoteLibraryFactory
+        SimpleXMLRPCServer.__init__(self, (host, int(port)), requestHandler=_RemoteRequestHandler,
+                                    logRequests=False)
+        self.current = threading.local()
+        self.idleTimeout = idleTimeout
+        self.lock = threading.Lock()
+        self.namespaces = {}
+        self.keywordResult = KeywordResult
+        self.library = RemoteLibraryFactory(FtpLibrary(transferInfo=True))
+        self.register_function(self.get_keyword_names)
+        self.register_function(self.get_keyword_arguments)
+        self.register_function(self.get_keyword_documentation)
+        self.register_function(self.run_keyword)
+        self.register_function(self.stop_remote_server)
+
+    def get_keyword_names(self):
+        return self.library.get_keyword_names() + ['stop_remote_server']
+
+    def get_keyword_arguments(self, name):
+        if name == 'stop_remote_server':
+            return []
+        return self.library.get_keyword_arguments(name)
+
+    def get_keyword_documentation(self, name):
+        if name == 'stop_remote_server':
+            return 'Stops the remote server.'
+        return self.library.get_keyword_documentation(name)
+
+    def run_keyword(self, name, args, kwargs=None):
+        result = self.keywordResult()
+        try:
+            if name == 'stop_remote_server':
+                returnValue = self.stop_remote_server()
+            else:
+                entry = self.__namespace(self.current.namespace)
+                library, lock = entry[0], entry[1]
+                with lock:
+                    returnValue = getattr(library, name)(*self.__arguments(args), **self.__arguments(kwargs or {}))
+                    entry[2] = time.time()
+            result.set_return(returnValue)
+            result.set_status('PASS')
+        except Exception as e:
+            result.set_error(type(e), e)
+        return result.data
+
+    def stop_remote_server(self):
+        stopper = threading.Thread(target=self.shutdown)
+        stopper.daemon = True
+        stopper.start()
+        return True
+
+    def __arguments(self, value):
+        # binary arguments arrive wrapped in xmlrpc Binary objects
+        if isinstance(value, list):
+            return [self.__arguments(item) for item in value]
+        if isinstance(value, dict):
+            return dict((key, self.__arguments(item)) for key, item in value.items())
+        return getattr(value, 'data', value)
+
+    def __namespace(self, namespace):
+        # returns [library, lock, last use time] of namespace, closing idle ones
+        with self.lock:
+            now = time.time()
+            for name, (library, lock, lastUsed) in list(self.namespaces.items()):
+                if name != namespace and now - lastUsed > self.idleTimeout and lock.acquire(False):
+                    try:
+                        self.namespaces.pop(name)
+                        for connId in list(library.ftpList):
+                            try:
+                                library.ftp_close(connId)
+                            except Exception:
+                                pass
+                    finally:
+                        lock.release()
+            if namespace not in self.namespaces:
+                self.namespaces[namespace] = [FtpLibrary(transferInfo=True), threading.Lock(), now]
+            return self.namespaces[namespace]
+
 def main():
     import sys
     from robotremoteserver import RobotRemoteServer
     print("Starting Robot Framework Ftp Library as a remote server ...")
-    RobotRemoteServer(library=FtpLibrary(), host=sys.argv[1], port=sys.argv[2])
+    if len(sys.argv) > 3 and sys.argv[3] == 'concurrent':
+        server = _ConcurrentRemoteServer(sys.argv[1], sys.argv[2])
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        server.server_close()
+    else:
+        RobotRemoteServer(library=FtpLibrary(), host=sys.argv[1], port=sys.argv[2])
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,307 @@
+#Robot Framework FTP Library
+#
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU Lesser General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public License
+#along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Benchmarks of Robot Framework Ftp Library against a local FTP server.
+
+Starts pyftpdlib server on 127.0.0.1 (plain and, when pyOpenSSL is installed,
+TLS with a generated self-signed certificate) and measures:
+- ftp connect latency
+- dir and dir names on large directories
+- download file and upload file throughput for different file sizes
+- download file and upload file of many small files
+
+Results are printed (or saved with --output) as JSON. When a previous result
+is given with --compare, each measurement is compared with it and the script
+exits with status 1 if any of them got slower by more than --tolerance.
+
+Requires: pip install pyftpdlib (and pyopenssl for TLS)
+
+Examples:
+    python ftpLibraryBenchmark.py
+    python ftpLibraryBenchmark.py --quick --output baseline.json
+    python ftpLibraryBenchmark.py --output current.json --compare baseline.json --tolerance 0.3
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import timeit
+import warnings
+
+from FtpLibrary import FtpLibrary
+
+USER = 'benchmark'
+PASSWORD = 'benchmark'
+
+FULL = {'connects': 20, 'repeats': 5, 'listingSizes': [1000, 10000],
+        'fileSizes': [1024, 1048576, 16777216], 'fileCounts': [100, 500], 'smallFileSize': 4096}
+QUICK = {'connects': 5, 'repeats': 2, 'listingSizes': [1000],
+         'fileSizes': [1024, 1048576], 'fileCounts': [50], 'smallFileSize': 4096}
+
+
+def startServer(root, certFile=None):
+    # returns (port, stop function) of pyftpdlib server running in a background thread
+    from pyftpdlib.authorizers import DummyAuthorizer
+    from pyftpdlib.handlers import FTPHandler
+    from pyftpdlib.ioloop import IOLoop
+    from pyftpdlib.servers import ThreadedFTPServer
+    serverLogger = logging.getLogger('pyftpdlib')
+    if not serverLogger.handlers:
+        # keeps pyftpdlib from logging every command to console
+        serverLogger.addHandler(logging.NullHandler())
+        serverLogger.setLevel(logging.WARNING)
+    authorizer = DummyAuthorizer()
+    authorizer.add_user(USER, PASSWORD, root, perm='elradfmwMT')
+    if certFile is None:
+        handler = type('BenchmarkHandler', (FTPHandler,), {})
+    else:
+        from pyftpdlib.handlers import TLS_FTPHandler
+        handler = type('BenchmarkTlsHandler', (TLS_FTPHandler,), {'certfile': certFile})
+    handler.authorizer = authorizer
+    handler.banner = "ftpLibraryBenchmark ready"
+    server = ThreadedFTPServer(('127.0.0.1', 0), handler, ioloop=IOLoop())
+    stopped = threading.Event()
+
+    def serve():
+        # server is closed in its own thread, so no file descriptor is closed while polled
+        while not stopped.is_set():
+            server.serve_forever(timeout=0.1, blocking=False, handle_exit=False)
+        server.close_all()
+
+    def stop():
+        stopped.set()
+        thread.join()
+
+    thread = threading.Thread(target=serve)
+    thread.daemon = True
+    thread.start()
+    return server.socket.getsockname()[1], stop
+
+
+def createCertificate(path):
+    # writes self-signed certificate and its key to path, returns False without pyOpenSSL
+    try:
+        from OpenSSL import crypto
+    except ImportError:
+        return False
+    with warnings.catch_warnings():
+        # recent pyOpenSSL releases deprecate crypto module
+        warnings.simplefilter('ignore', DeprecationWarning)
+        key = crypto.PKey()
+        key.generate_key(crypto.TYPE_RSA, 2048)
+        cert = crypto.X509()
+        cert.get_subject().CN = '127.0.0.1'
+        cert.set_serial_number(1)
+        cert.gmtime_adj_notBefore(0)
+        cert.gmtime_adj_notAfter(24 * 60 * 60)
+        cert.set_issuer(cert.get_subject())
+        cert.set_pubkey(key)
+        cert.sign(key, 'sha256')
+        with open(path, 'wb') as f:
+            f.write(crypto.dump_privatekey(crypto.FILETYPE_PEM, key))
+            f.write(crypto.dump_certificate(crypto.FILETYPE_PEM, cert))
+    return True
+
+
+def summarize(times):
+    times = sorted(times)
+    middle = len(times) // 2
+    median = times[middle] if len(times) % 2 else (times[middle - 1] + times[middle]) / 2.0
+    return {'runs': len(times), 'min': times[0], 'median': median, 'max': times[-1],
+            'mean': sum(times) / len(times)}
+
+
+def measure(function, repeats, setup=None):
+    times = []
+    for i in range(repeats):
+        if setup is not None:
+            setup()
+        start = timeit.default_timer()
+        function()
+        times.append(timeit.default_timer() - start)
+    return summarize(times)
+
+
+def withThroughput(result, size):
+    result['bytesPerSecond'] = size / result['median'] if result['median'] > 0 else None
+    return result
+
+
+def writeFile(path, size):
+    block = os.urandom(min(size, 1048576))
+    with open(path, 'wb') as f:
+        written = 0
+        while written < size:
+            f.write(block[:size - written])
+            written += len(block)
+
+
+def benchmarkConnect(library, port, connects, tls):
+    def connect():
+        library.ftp_connect('127.0.0.1', USER, PASSWORD, port, tls=tls, connId='connect')
+        library.ftp_close('connect')
+    return measure(connect, connects)
+
+
+def benchmarkListing(library, root, listingSizes, repeats):
+    results = {}
+    for count in listingSizes:
+        dirName = 'listing%d' % count
+        os.mkdir(os.path.join(root, dirName))
+        for i in range(count):
+            open(os.path.join(root, dirName, 'file%06d.txt' % i), 'w').close()
+        library.cwd(dirName)
+        results[str(count)] = {'dir': measure(lambda: library.dir(), repeats),
+                               'dirNames': measure(lambda: library.dir_names(), repeats)}
+        library.cwd('/')
+    return results
+
+
+def benchmarkFileSizes(library, root, localDir, fileSizes, repeats):
+    results = {}
+    for size in fileSizes:
+        name = 'size%d.bin' % size
+        localPath = os.path.join(localDir, name)
+        writeFile(os.path.join(root, name), size)
+        download = measure(lambda: library.download_file(name, localPath), repeats)
+        upload = measure(lambda: library.upload_file(localPath, 'uploaded_' + name), repeats)
+        results[str(size)] = {'download': withThroughput(download, size), 'upload': withThroughput(upload, size)}
+    return results
+
+
+def benchmarkFileCounts(library, root, localDir, fileCounts, fileSize, repeats):
+    results = {}
+    for count in fileCounts:
+        dirName = 'count%d' % count
+        localPath = os.path.join(localDir, dirName)
+        os.mkdir(os.path.join(root, dirName))
+        os.mkdir(localPath)
+        names = ['file%06d.bin' % i for i in range(count)]
+        for name in names:
+            writeFile(os.path.join(root, dirName, name), fileSize)
+        library.cwd(dirName)
+
+        def download():
+            for name in names:
+                library.download_file(name, os.path.join(localPath, name))
+
+        def upload():
+            for name in names:
+                library.upload_file(os.path.join(localPath, name), 'up_' + name)
+
+        results[str(count)] = {'download': withThroughput(measure(download, repeats), count * fileSize),
+                               'upload': withThroughput(measure(upload, repeats), count * fileSize)}
+        library.cwd('/')
+    return results
+
+
+def runServerBenchmarks(settings, tls, certFile):
+    root = tempfile.mkdtemp(prefix='ftpbench_server_')
+    localDir = tempfile.mkdtemp(prefix='ftpbench_local_')
+    port, stopServer = startServer(root, certFile if tls else None)
+    library = FtpLibrary(printOutput=False)
+    try:
+        result = {'connect': benchmarkConnect(library, port, settings['connects'], tls)}
+        library.ftp_connect('127.0.0.1', USER, PASSWORD, port, tls=tls)
+        if tls:
+            library.secure_data_connection()
+        result['listing'] = benchmarkListing(library, root, settings['listingSizes'], settings['repeats'])
+        result['fileSizes'] = benchmarkFileSizes(library, root, localDir, settings['fileSizes'],
+                                                 settings['repeats'])
+        result['fileCounts'] = benchmarkFileCounts(library, root, localDir, settings['fileCounts'],
+                                                   settings['smallFileSize'], settings['repeats'])
+        library.ftp_close()
+        return result
+    finally:
+        stopServer()
+        shutil.rmtree(root, ignore_errors=True)
+        shutil.rmtree(localDir, ignore_errors=True)
+
+
+def flatten(result, prefix=''):
+    # maps "plain.listing.1000.dir" like keys to median times
+    values = {}
+    for key, value in result.items():
+        if not isinstance(value, dict):
+            continue
+        if 'median' in value:
+            values[prefix + key] = value['median']
+        else:
+            values.update(flatten(value, prefix + key + '.'))
+    return values
+
+
+def compare(current, baseline, tolerance):
+    # returns list of measurements slower than baseline by more than tolerance
+    previous = flatten(baseline['results'])
+    regressions = []
+    for key, median in sorted(flatten(current['results']).items()):
+        if previous.get(key) and median > previous[key] * (1 + tolerance):
+            regressions.append({'measurement': key, 'baseline': previous[key], 'current': median,
+                                'change': median / previous[key] - 1})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of Robot Framework Ftp Library against "
+                                                 "a local pyftpdlib server.")
+    parser.add_argument('--quick', action='store_true', help="fewer repeats and smaller data sets")
+    parser.add_argument('--no-tls', dest='tls', action='store_false', help="skip TLS benchmarks")
+    parser.add_argument('--output', help="save JSON result to this file instead of printing it")
+    parser.add_argument('--compare', help="JSON result of previous run to compare with")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed slowdown against compared result, 0.2 means 20%% (default)")
+    args = parser.parse_args()
+    settings = QUICK if args.quick else FULL
+    report = {'timestamp': datetime.datetime.now().isoformat(),
+              'python': platform.python_version(), 'platform': platform.platform(),
+              'settings': settings, 'results': {}}
+    report['results']['plain'] = runServerBenchmarks(settings, False, None)
+    if args.tls:
+        certDir = tempfile.mkdtemp(prefix='ftpbench_cert_')
+        certFile = os.path.join(certDir, 'server.pem')
+        try:
+            if createCertificate(certFile):
+                report['results']['tls'] = runServerBenchmarks(settings, True, certFile)
+            else:
+                report['tlsSkipped'] = "pyOpenSSL is not installed"
+        finally:
+            shutil.rmtree(certDir, ignore_errors=True)
+    exitCode = 0
+    if args.compare:
+        with open(args.compare) as f:
+            report['regressions'] = compare(report, json.load(f), args.tolerance)
+        exitCode = 1 if report['regressions'] else 0
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    for regression in report.get('regressions', []):
+        sys.stderr.write("Regression: %(measurement)s %(baseline).6f s -> %(current).6f s\n" % regression)
+    return exitCode
+
+
+if __name__ == '__main__':
+    sys.exit(main())
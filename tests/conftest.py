@@ -0,0 +1,83 @@
+import logging
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pyftpdlib = pytest.importorskip('pyftpdlib')
+
+from pyftpdlib.authorizers import DummyAuthorizer
+from pyftpdlib.handlers import FTPHandler
+from pyftpdlib.ioloop import IOLoop
+from pyftpdlib.servers import ThreadedFTPServer
+
+from FtpLibrary import FtpLibrary
+
+USER = 'user'
+PASSWORD = 'password'
+
+serverLogger = logging.getLogger('pyftpdlib')
+serverLogger.addHandler(logging.NullHandler())
+serverLogger.setLevel(logging.WARNING)
+
+
+class FtpServer(object):
+    # pyftpdlib server serving root directory in a background thread
+
+    def __init__(self, root, handler=FTPHandler, host='127.0.0.1'):
+        authorizer = DummyAuthorizer()
+        authorizer.add_user(USER, PASSWORD, root, perm='elradfmwMT')
+        self.handler = type('TestHandler', (handler,), {'authorizer': authorizer})
+        self.root = root
+        self.server = ThreadedFTPServer((host, 0), self.handler, ioloop=IOLoop())
+        self.host, self.port = self.server.socket.getsockname()[:2]
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.serve)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def serve(self):
+        while not self.stopped.is_set():
+            self.server.serve_forever(timeout=0.1, blocking=False, handle_exit=False)
+        self.server.close_all()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def path(self, *names):
+        return os.path.join(self.root, *names)
+
+
+@pytest.fixture
+def ftpServer(tmp_path):
+    # returns function starting a server, servers are stopped after test
+    servers = []
+
+    def start(handler=FTPHandler, name='server', host='127.0.0.1'):
+        root = tmp_path / name
+        root.mkdir()
+        servers.append(FtpServer(str(root), handler, host))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def library():
+    ftp = FtpLibrary(printOutput=False)
+    yield ftp
+    for connId in list(ftp.ftpList):
+        try:
+            ftp.ftp_close(connId)
+        except Exception:
+            pass
+
+
+def connect(library, server, connId='default', **kwargs):
+    library.ftp_connect(server.host, USER, PASSWORD, server.port, connId=connId, **kwargs)
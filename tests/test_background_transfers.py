@@ -0,0 +1,90 @@
+import os
+import time
+
+import pytest
+from pyftpdlib.handlers import FTPHandler
+
+from FtpLibrary import FtpLibraryError
+from conftest import connect
+
+CONTENT = os.urandom(200000)
+
+
+class SlowHandler(FTPHandler):
+    # transfers start half a second after RETR or STOR
+    def ftp_RETR(self, file):
+        self.ioloop.call_later(0.5, FTPHandler.ftp_RETR, self, file)
+
+    def ftp_STOR(self, file, mode='w'):
+        self.ioloop.call_later(0.5, FTPHandler.ftp_STOR, self, file, mode)
+
+
+def writeRemote(server):
+    with open(server.path('f.bin'), 'wb') as f:
+        f.write(CONTENT)
+
+
+def test_background_download_while_connection_is_used(ftpServer, library, tmp_path):
+    server = ftpServer()
+    writeRemote(server)
+    connect(library, server)
+    handle = library.start_download('f.bin', str(tmp_path / 'f.bin'))
+    library.mkd('other')
+    assert library.wait_for_transfer(handle).startswith('226')
+    assert (tmp_path / 'f.bin').read_bytes() == CONTENT
+    assert os.path.isdir(server.path('other'))
+
+
+def test_background_upload_progress(ftpServer, library, tmp_path):
+    server = ftpServer(SlowHandler)
+    (tmp_path / 'f.bin').write_bytes(CONTENT)
+    connect(library, server)
+    handle = library.start_upload(str(tmp_path / 'f.bin'))
+    progress = library.get_transfer_progress(handle)
+    assert progress['done'] is False
+    assert progress['error'] is None
+    library.wait_for_transfer(handle)
+    with open(server.path('f.bin'), 'rb') as f:
+        assert f.read() == CONTENT
+
+
+def test_wait_for_transfer_timeout(ftpServer, library, tmp_path):
+    server = ftpServer(SlowHandler)
+    writeRemote(server)
+    connect(library, server)
+    handle = library.start_download('f.bin', str(tmp_path / 'f.bin'))
+    with pytest.raises(FtpLibraryError) as error:
+        library.wait_for_transfer(handle, timeout=0.2)
+    assert 'not finished within 0.2 seconds' in str(error.value)
+    # transfer keeps running and can be waited for again
+    progress = library.get_transfer_progress(handle)
+    assert progress['total'] == len(CONTENT)
+    assert progress['transferred'] == 0
+    assert progress['percent'] == 0
+    assert progress['done'] is False
+    library.wait_for_transfer(handle)
+    assert (tmp_path / 'f.bin').read_bytes() == CONTENT
+
+
+def test_failed_background_transfer(ftpServer, library, tmp_path):
+    server = ftpServer()
+    connect(library, server)
+    handle = library.start_download('missing.bin', str(tmp_path / 'missing.bin'))
+    with pytest.raises(FtpLibraryError) as error:
+        library.wait_for_transfer(handle)
+    assert str(error.value).startswith('550')
+    # finished transfer is forgotten
+    with pytest.raises(FtpLibraryError):
+        library.get_transfer_progress(handle)
+
+
+def test_failed_background_transfer_progress(ftpServer, library, tmp_path):
+    server = ftpServer()
+    connect(library, server)
+    handle = library.start_download('missing.bin', str(tmp_path / 'missing.bin'))
+    deadline = time.time() + 5
+    while not library.get_transfer_progress(handle)['done'] and time.time() < deadline:
+        time.sleep(0.01)
+    progress = library.get_transfer_progress(handle)
+    assert progress['done'] is True
+    assert progress['error'].startswith('550')
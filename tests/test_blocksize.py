@@ -0,0 +1,62 @@
+import hashlib
+import os
+
+import pytest
+
+from FtpLibrary import FtpLibrary
+from conftest import connect
+
+# size not divisible by any tested block size
+CONTENT = os.urandom(100003)
+
+
+@pytest.mark.parametrize('blocksize', ['1', '1000', '65536', '1048576'])
+def test_download(ftpServer, library, tmp_path, blocksize):
+    server = ftpServer()
+    with open(server.path('f.bin'), 'wb') as f:
+        f.write(CONTENT)
+    connect(library, server)
+    library.download_file('f.bin', str(tmp_path / 'f.bin'), blocksize=blocksize)
+    assert (tmp_path / 'f.bin').read_bytes() == CONTENT
+
+
+@pytest.mark.parametrize('blocksize', ['1', '1000', '65536', '1048576'])
+@pytest.mark.parametrize('checksum', [None, 'sha256'])
+def test_upload(ftpServer, library, tmp_path, blocksize, checksum):
+    # with checksum data is sent from reused buffer instead of sendfile
+    server = ftpServer()
+    (tmp_path / 'f.bin').write_bytes(CONTENT)
+    connect(library, server)
+    result = library.upload_file(str(tmp_path / 'f.bin'), blocksize=blocksize, checksum=checksum)
+    with open(server.path('f.bin'), 'rb') as f:
+        assert f.read() == CONTENT
+    if checksum:
+        assert result == hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_download_does_not_keep_previous_block_data(ftpServer, library, tmp_path):
+    # last block is shorter than buffer which still holds bytes of previous block
+    server = ftpServer()
+    with open(server.path('f.txt'), 'wb') as f:
+        f.write(b'abcdefghij' * 3 + b'xy')
+    connect(library, server)
+    digest = library.download_file('f.txt', str(tmp_path / 'f.txt'), blocksize=10, checksum='md5')
+    assert (tmp_path / 'f.txt').read_bytes() == b'abcdefghij' * 3 + b'xy'
+    assert digest == hashlib.md5(b'abcdefghij' * 3 + b'xy').hexdigest()
+
+
+def test_blocksize_given_during_import(ftpServer, tmp_path):
+    server = ftpServer()
+    with open(server.path('f.bin'), 'wb') as f:
+        f.write(CONTENT)
+    library = FtpLibrary(printOutput=False, blocksize='4096')
+    assert library.blocksize == 4096
+    connect(library, server)
+    try:
+        library.download_file('f.bin', str(tmp_path / 'f.bin'))
+        library.upload_file(str(tmp_path / 'f.bin'), 'g.bin', checksum='crc32')
+    finally:
+        library.ftp_close()
+    assert (tmp_path / 'f.bin').read_bytes() == CONTENT
+    with open(server.path('g.bin'), 'rb') as f:
+        assert f.read() == CONTENT
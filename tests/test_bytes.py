@@ -0,0 +1,27 @@
+import pytest
+
+from FtpLibrary import FtpLibraryError
+from conftest import connect
+
+
+def test_upload_bytes_from_string(ftpServer, library):
+    server = ftpServer()
+    connect(library, server)
+    library.upload_bytes(u'\x00\x01\xff', 'f.bin')
+    assert library.download_bytes('f.bin') == b'\x00\x01\xff'
+
+
+@pytest.mark.parametrize('data', [u'€', 42])
+def test_upload_bytes_rejects_other_data(ftpServer, library, data):
+    server = ftpServer()
+    connect(library, server)
+    with pytest.raises(FtpLibraryError) as error:
+        library.upload_bytes(data, 'f.bin')
+    assert 'Upload Text' in str(error.value)
+
+
+def test_upload_text(ftpServer, library):
+    server = ftpServer()
+    connect(library, server)
+    library.upload_text(u'€', 'f.txt')
+    assert library.download_text('f.txt') == u'€'
@@ -0,0 +1,29 @@
+import pytest
+
+from FtpLibrary import _Checksum
+
+
+@pytest.mark.parametrize('reply, expected', [
+    ('213 CRC32 0-1024 8d9f417a 20240101', '8d9f417a'),
+    ('213 CRC32 0-1024 8d9f417a report 2024.txt', '8d9f417a'),
+    ('213 CRC32 0-1024 1a2b3c file.bin', '001a2b3c'),
+    ('213 CRC32 8d9f417a', None),
+])
+def test_hash_reply(reply, expected):
+    assert _Checksum('crc32').parseReply(reply, True) == expected
+
+
+@pytest.mark.parametrize('reply, expected', [
+    ('250 8D9F417A', '8d9f417a'),
+    ('213 12345678 8d9f417a', '8d9f417a'),
+    ('250', None),
+    ('250 not-a-digest', None),
+])
+def test_x_command_reply(reply, expected):
+    assert _Checksum('crc32').parseReply(reply) == expected
+
+
+def test_hash_reply_sha256():
+    digest = 'ab' * 32
+    assert _Checksum('sha256').parseReply('213 SHA-256 0-99 %s 0123456789' % digest.upper(), True) == digest
+    assert _Checksum('sha256').parseReply('213 SHA-256 0-99 abcd 0123456789', True) is None
@@ -0,0 +1,143 @@
+import zlib
+
+from pyftpdlib.handlers import FTPHandler
+
+from conftest import connect
+
+CONTENT = b'compressible line of text\n' * 20000
+
+
+class _Compressor(object):
+    # producer compressing data of another producer
+    def __init__(self, producer):
+        self.producer = producer
+        self.compressor = zlib.compressobj()
+        self.finished = False
+
+    def more(self):
+        while not self.finished:
+            data = self.producer.more()
+            if not data:
+                self.finished = True
+                return self.compressor.flush()
+            data = self.compressor.compress(data)
+            if data:
+                return data
+        return b''
+
+
+class _Data(object):
+    # producer of bytes pushed at once
+    def __init__(self, data):
+        self.data = data
+
+    def more(self):
+        data, self.data = self.data, b''
+        return data
+
+
+class _Decompressor(object):
+    # file object decompressing received data before writing it
+    def __init__(self, file):
+        self.file = file
+        self.decompressor = zlib.decompressobj()
+
+    def write(self, data):
+        self.file.write(self.decompressor.decompress(data))
+        return len(data)
+
+    def close(self):
+        self.file.write(self.decompressor.flush())
+        self.file.close()
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+def compressingHandler():
+    # handler supporting MODE Z, records (command, compressed) of every transfer
+    class CompressingHandler(FTPHandler):
+        use_sendfile = False
+        modeZ = False
+        transfers = []
+
+        def ftp_MODE(self, line):
+            mode = line.upper()
+            if mode not in ('S', 'Z'):
+                self.respond("504 Unimplemented MODE type.")
+                return
+            self.modeZ = mode == 'Z'
+            self.respond("200 Transfer mode set to: %s" % mode)
+
+        def push_dtp_data(self, data, isproducer=False, file=None, cmd=None):
+            self.transfers.append((cmd, self.modeZ))
+            if self.modeZ:
+                data = _Compressor(data if isproducer else _Data(data))
+                isproducer = True
+            return FTPHandler.push_dtp_data(self, data, isproducer, file, cmd)
+
+        def run_as_current_user(self, function, *args, **kwargs):
+            result = FTPHandler.run_as_current_user(self, function, *args, **kwargs)
+            if function == self.fs.open and args[1][0] in 'wa':
+                self.transfers.append(('STOR', self.modeZ))
+                if self.modeZ:
+                    result = _Decompressor(result)
+            return result
+
+    return CompressingHandler
+
+
+def test_download(ftpServer, library, tmp_path):
+    server = ftpServer(compressingHandler())
+    with open(server.path('f.txt'), 'wb') as f:
+        f.write(CONTENT)
+    connect(library, server, compression=True)
+    library.download_file('f.txt', str(tmp_path / 'f.txt'))
+    assert (tmp_path / 'f.txt').read_bytes() == CONTENT
+    assert server.handler.transfers == [('RETR', True)]
+
+
+def test_upload(ftpServer, library, tmp_path):
+    server = ftpServer(compressingHandler())
+    (tmp_path / 'f.txt').write_bytes(CONTENT)
+    connect(library, server, compression=True)
+    library.upload_file(str(tmp_path / 'f.txt'))
+    with open(server.path('f.txt'), 'rb') as f:
+        assert f.read() == CONTENT
+    assert server.handler.transfers == [('STOR', True)]
+
+
+def test_listing(ftpServer, library):
+    server = ftpServer(compressingHandler())
+    names = ['file%04d.txt' % i for i in range(500)]
+    for name in names:
+        open(server.path(name), 'w').close()
+    connect(library, server, compression=True)
+    listing = library.dir()
+    assert all(any(line.endswith(name) for line in listing) for name in names)
+    assert sorted(library.dir_names()) == names
+    assert server.handler.transfers == [('LIST', True), ('NLST', True)]
+
+
+def test_resumed_download_is_not_compressed(ftpServer, library, tmp_path):
+    server = ftpServer(compressingHandler())
+    with open(server.path('f.txt'), 'wb') as f:
+        f.write(CONTENT)
+    (tmp_path / 'f.txt').write_bytes(CONTENT[:100000])
+    connect(library, server, compression=True)
+    library.download_file('f.txt', str(tmp_path / 'f.txt'), resume=True)
+    assert (tmp_path / 'f.txt').read_bytes() == CONTENT
+    assert server.handler.transfers == [('RETR', False)]
+    # later transfers are compressed again
+    library.download_file('f.txt', str(tmp_path / 'g.txt'))
+    assert (tmp_path / 'g.txt').read_bytes() == CONTENT
+    assert server.handler.transfers[-1] == ('RETR', True)
+
+
+def test_server_without_mode_z(ftpServer, library, tmp_path):
+    server = ftpServer()
+    with open(server.path('f.txt'), 'wb') as f:
+        f.write(CONTENT)
+    connect(library, server, compression=True)
+    library.download_file('f.txt', str(tmp_path / 'f.txt'))
+    assert (tmp_path / 'f.txt').read_bytes() == CONTENT
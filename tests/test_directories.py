@@ -0,0 +1,164 @@
+import os
+
+import pytest
+from pyftpdlib.handlers import FTPHandler
+
+from FtpLibrary import FtpLibraryError
+from conftest import connect
+
+
+def localTree(tmp_path):
+    localDir = tmp_path / 'local'
+    (localDir / 'sub').mkdir(parents=True)
+    (localDir / 'sub' / 'a.txt').write_text('a')
+    return localDir
+
+
+def test_upload_directory_into_existing_directory(ftpServer, library, tmp_path):
+    server = ftpServer()
+    os.makedirs(server.path('deploy', 'sub'))
+    connect(library, server)
+    library.upload_directory(str(localTree(tmp_path)), 'deploy')
+    assert os.listdir(server.path('deploy', 'sub')) == ['a.txt']
+    assert library.pwd() == '/'
+
+
+def test_upload_directory_fails_when_directory_cannot_be_created(ftpServer, library, tmp_path):
+    server = ftpServer()
+    os.mkdir(server.path('deploy'))
+    with open(server.path('deploy', 'sub'), 'w') as f:
+        f.write('file in place of directory')
+    connect(library, server)
+    with pytest.raises(FtpLibraryError) as error:
+        library.upload_directory(str(localTree(tmp_path)), 'deploy')
+    assert str(error.value).startswith('550')
+    assert library.pwd() == '/'
+
+
+def test_download_nested_directory(ftpServer, library, tmp_path, monkeypatch):
+    server = ftpServer()
+    os.makedirs(server.path('data', 'sub', 'empty'))
+    content = {('a.bin',): os.urandom(70000), ('sub', 'b.txt'): b'b'}
+    for path, data in content.items():
+        with open(server.path('data', *path), 'wb') as f:
+            f.write(data)
+    (tmp_path / 'out').mkdir()
+    monkeypatch.chdir(str(tmp_path / 'out'))
+    connect(library, server)
+    files = library.download_directory('data', workers=2)
+    assert sorted(files) == [os.path.join('data', 'a.bin'), os.path.join('data', 'sub', 'b.txt')]
+    for path, data in content.items():
+        assert (tmp_path / 'out' / 'data').joinpath(*path).read_bytes() == data
+    assert (tmp_path / 'out' / 'data' / 'sub' / 'empty').is_dir()
+
+
+def test_download_directory_reports_failed_files(ftpServer, library, tmp_path):
+    class RefusingHandler(FTPHandler):
+        def ftp_RETR(self, file):
+            if os.path.basename(file) == 'bad.txt':
+                self.respond("550 Refused.")
+                return
+            return FTPHandler.ftp_RETR(self, file)
+
+    server = ftpServer(RefusingHandler)
+    os.mkdir(server.path('data'))
+    for name in ('a.txt', 'bad.txt', 'c.txt'):
+        with open(server.path('data', name), 'w') as f:
+            f.write(name)
+    connect(library, server)
+    with pytest.raises(FtpLibraryError) as error:
+        library.download_directory('data', str(tmp_path / 'out'))
+    assert 'bad.txt: 550 Refused.' in str(error.value)
+    assert (tmp_path / 'out' / 'c.txt').read_text() == 'c.txt'
+
+
+def test_download_directory_with_connection_limit(ftpServer, library, tmp_path):
+    server = ftpServer()
+    server.server.max_cons_per_ip = 3
+    os.mkdir(server.path('data'))
+    for i in range(30):
+        with open(server.path('data', 'f%02d.txt' % i), 'w') as f:
+            f.write('file %d' % i)
+    connect(library, server)
+    files = library.download_directory('data', str(tmp_path / 'out'), workers=4)
+    assert len(files) == 30
+    assert sorted(os.listdir(str(tmp_path / 'out'))) == sorted(os.listdir(server.path('data')))
+
+
+def test_download_directory_fails_when_no_worker_connects(ftpServer, library, tmp_path):
+    server = ftpServer()
+    server.server.max_cons_per_ip = 1
+    os.mkdir(server.path('data'))
+    with open(server.path('data', 'f.txt'), 'w') as f:
+        f.write('file')
+    connect(library, server)
+    with pytest.raises(FtpLibraryError) as error:
+        library.download_directory('data', str(tmp_path / 'out'))
+    assert '421' in str(error.value)
+
+
+def test_download_root_directory_to_current_directory(ftpServer, library, tmp_path, monkeypatch):
+    server = ftpServer()
+    with open(server.path('f.txt'), 'w') as f:
+        f.write('file')
+    monkeypatch.chdir(str(tmp_path))
+    connect(library, server)
+    files = library.download_directory('/')
+    assert files == [os.path.join(os.curdir, 'f.txt')]
+    assert (tmp_path / 'f.txt').read_text() == 'file'
+
+
+def remoteTree(server):
+    for d in ('tree/sub/deep', 'tree/other'):
+        os.makedirs(server.path(*d.split('/')))
+    for f in ('tree/a.txt', 'tree/sub/b.txt', 'tree/sub/deep/c.txt', 'tree/other/d.txt'):
+        with open(server.path(*f.split('/')), 'w') as localFile:
+            localFile.write(f)
+
+
+def test_remove_directory_recursively_with_connection_limit(ftpServer, library):
+    server = ftpServer()
+    server.server.max_cons_per_ip = 2
+    remoteTree(server)
+    connect(library, server)
+    assert library.remove_directory_recursively('tree', workers=4) == 4
+    assert os.listdir(server.root) == []
+
+
+def test_remove_directory_recursively_keeps_directories_of_failed_files(ftpServer, library):
+    class RefusingHandler(FTPHandler):
+        def ftp_DELE(self, path):
+            if os.path.basename(path) == 'b.txt':
+                self.respond("550 Refused.")
+                return
+            return FTPHandler.ftp_DELE(self, path)
+
+    server = ftpServer(RefusingHandler)
+    remoteTree(server)
+    connect(library, server)
+    with pytest.raises(FtpLibraryError) as error:
+        library.remove_directory_recursively('tree')
+    assert 'sub/b.txt' in str(error.value)
+    assert os.listdir(server.path('tree')) == ['sub']
+    assert os.listdir(server.path('tree', 'sub')) == ['b.txt']
+
+
+class PhysicalHandler(FTPHandler):
+    # resolves symbolic links when changing directory, like servers with physical path semantics
+    def ftp_CWD(self, path):
+        return FTPHandler.ftp_CWD(self, os.path.realpath(path))
+
+
+def test_working_directory_is_read_from_server_after_cwd(ftpServer, library, tmp_path):
+    server = ftpServer(PhysicalHandler)
+    os.makedirs(server.path('a', 'b'))
+    os.symlink(server.path('a', 'b'), server.path('link'))
+    with open(server.path('a', 'f.txt'), 'w') as f:
+        f.write('in a')
+    connect(library, server)
+    library.cwd('/')
+    library.cwd('link')
+    library.cwd('..')
+    assert library.pwd() == '/a'
+    files = library.download_directory('.', str(tmp_path / 'out'))
+    assert files == [str(tmp_path / 'out' / 'f.txt')]
@@ -0,0 +1,115 @@
+import os
+
+import pytest
+from pyftpdlib.handlers import FTPHandler
+
+from FtpLibrary import FtpLibraryError
+from conftest import connect
+
+NAMES = ['data_1.csv', 'data_22.csv', 'data_x.csv', 'notes.txt', 'report.CSV']
+
+
+class RefusingHandler(FTPHandler):
+    # refuses transfers of files named bad.*
+    def ftp_RETR(self, file):
+        if os.path.basename(file).startswith('bad.'):
+            self.respond("550 Refused.")
+            return
+        return FTPHandler.ftp_RETR(self, file)
+
+    def ftp_STOR(self, file, mode='w'):
+        if os.path.basename(file).startswith('bad.'):
+            self.respond("553 Refused.")
+            return
+        return FTPHandler.ftp_STOR(self, file, mode)
+
+
+def remoteFiles(server, *names):
+    os.makedirs(server.path('data'))
+    os.makedirs(server.path('data', 'dir.csv'))
+    for name in names:
+        with open(server.path('data', name), 'w') as f:
+            f.write(name)
+
+
+def localFiles(directory, *names):
+    directory.mkdir()
+    (directory / 'dir.csv').mkdir()
+    for name in names:
+        (directory / name).write_text(name)
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_download_glob(ftpServer, library, tmp_path, workers):
+    server = ftpServer()
+    remoteFiles(server, *NAMES)
+    connect(library, server)
+    result = library.download_files_matching('*.csv', str(tmp_path / 'out'), 'data', workers=workers)
+    assert result == {'count': 3, 'bytes': 31, 'failures': {}}
+    assert sorted(os.listdir(str(tmp_path / 'out'))) == ['data_1.csv', 'data_22.csv', 'data_x.csv']
+    assert (tmp_path / 'out' / 'data_22.csv').read_text() == 'data_22.csv'
+
+
+def test_download_regex_from_working_directory(ftpServer, library, tmp_path):
+    server = ftpServer()
+    remoteFiles(server, *NAMES)
+    connect(library, server)
+    library.cwd('data')
+    result = library.download_files_matching(r'^data_\d+\.csv$', str(tmp_path / 'out'), regex=True)
+    assert result['count'] == 2
+    assert sorted(os.listdir(str(tmp_path / 'out'))) == ['data_1.csv', 'data_22.csv']
+
+
+def test_download_failures_do_not_stop_batch(ftpServer, library, tmp_path):
+    server = ftpServer(RefusingHandler)
+    remoteFiles(server, 'a.log', 'bad.log', 'c.log')
+    connect(library, server)
+    result = library.download_files_matching('*.log', str(tmp_path), 'data')
+    assert result['count'] == 2
+    assert list(result['failures']) == ['bad.log']
+    assert '550' in result['failures']['bad.log']
+    assert library.pwd() == '/'
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_upload(ftpServer, library, tmp_path, workers):
+    server = ftpServer(RefusingHandler)
+    os.mkdir(server.path('data'))
+    localFiles(tmp_path / 'local', *(NAMES + ['bad.csv']))
+    connect(library, server)
+    result = library.upload_files_matching('*.csv', str(tmp_path / 'local'), 'data', workers=workers)
+    assert result['count'] == 3
+    assert result['bytes'] == 31
+    assert list(result['failures']) == ['bad.csv']
+    assert sorted(os.listdir(server.path('data'))) == ['data_1.csv', 'data_22.csv', 'data_x.csv']
+
+
+def test_upload_regex_is_case_sensitive(ftpServer, library, tmp_path):
+    server = ftpServer()
+    localFiles(tmp_path / 'local', *NAMES)
+    connect(library, server)
+    result = library.upload_files_matching(r'\.CSV$', str(tmp_path / 'local'), regex='True')
+    assert result['count'] == 1
+    assert os.listdir(server.path()) == ['report.CSV']
+
+
+def test_nothing_matches(ftpServer, library, tmp_path):
+    server = ftpServer()
+    remoteFiles(server, *NAMES)
+    localFiles(tmp_path / 'local', *NAMES)
+    connect(library, server)
+    assert library.download_files_matching('*.zip', str(tmp_path / 'out'), 'data', workers=4) == \
+        {'count': 0, 'bytes': 0, 'failures': {}}
+    assert library.upload_files_matching('*.zip', str(tmp_path / 'local'), 'data', workers=4) == \
+        {'count': 0, 'bytes': 0, 'failures': {}}
+
+
+def test_invalid_arguments(ftpServer, library, tmp_path):
+    server = ftpServer()
+    remoteFiles(server, *NAMES)
+    connect(library, server)
+    with pytest.raises(FtpLibraryError) as error:
+        library.download_files_matching('data_(', str(tmp_path), 'data', regex=True)
+    assert 'Invalid regular expression' in str(error.value)
+    with pytest.raises(FtpLibraryError):
+        library.upload_files_matching('*', str(tmp_path / 'missing'))
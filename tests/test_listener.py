@@ -0,0 +1,24 @@
+from FtpLibrary import FtpLibrary
+from conftest import connect
+
+
+def test_end_suite_without_statistics_file(ftpServer, tmp_path):
+    server = ftpServer()
+    library = FtpLibrary(printOutput=False, connectionPool=True)
+    connect(library, server)
+    try:
+        library._end_suite('Suite', {'longname': 'Suite'})
+    finally:
+        library._close()
+
+
+def test_end_suite_saves_statistics(ftpServer, tmp_path):
+    server = ftpServer()
+    statisticsFile = tmp_path / 'statistics.json'
+    library = FtpLibrary(printOutput=False, statisticsFile=str(statisticsFile))
+    connect(library, server)
+    try:
+        library._end_suite('Suite', {'longname': 'Suite'})
+    finally:
+        library.ftp_close()
+    assert 'Suite' in statisticsFile.read_text()
@@ -0,0 +1,86 @@
+import os
+
+from FtpLibrary import FtpLibrary
+from conftest import connect
+
+
+def writeRemote(server, name, content='content'):
+    with open(server.path(name), 'w') as f:
+        f.write(content)
+
+
+def test_list_directory(ftpServer, library):
+    server = ftpServer()
+    writeRemote(server, 'f.txt')
+    os.mkdir(server.path('sub'))
+    connect(library, server)
+    entries = dict((e['name'], e) for e in library.list_directory())
+    assert sorted(entries) == ['f.txt', 'sub']
+    assert entries['f.txt']['type'] == 'file'
+    assert entries['f.txt']['size'] == 7
+    assert entries['sub']['type'] == 'dir'
+    assert len(entries['f.txt']['modify']) == 14
+
+
+def test_get_file_info_is_cached(ftpServer, library):
+    server = ftpServer()
+    writeRemote(server, 'f.txt')
+    connect(library, server)
+    assert library.get_file_info('f.txt')['size'] == 7
+    # changed by someone else, not visible until cache expires
+    writeRemote(server, 'f.txt', 'longer content')
+    assert library.get_file_info('f.txt')['size'] == 7
+    assert library.get_file_info('missing.txt') is None
+
+
+def test_get_file_info_without_cache(ftpServer):
+    server = ftpServer()
+    writeRemote(server, 'f.txt')
+    library = FtpLibrary(printOutput=False, listingCacheTtl=0)
+    connect(library, server)
+    try:
+        assert library.get_file_info('f.txt')['size'] == 7
+        writeRemote(server, 'f.txt', 'longer content')
+        assert library.get_file_info('f.txt')['size'] == 14
+    finally:
+        library.ftp_close()
+
+
+def test_get_file_info_after_delete(ftpServer, library):
+    server = ftpServer()
+    writeRemote(server, 'f.txt')
+    connect(library, server)
+    assert library.get_file_info('f.txt') is not None
+    library.delete('f.txt')
+    assert library.get_file_info('f.txt') is None
+
+
+def test_get_file_info_after_rename(ftpServer, library):
+    server = ftpServer()
+    writeRemote(server, 'f.txt')
+    connect(library, server)
+    assert library.get_file_info('g.txt') is None
+    library.rename('f.txt', 'g.txt')
+    assert library.get_file_info('f.txt') is None
+    assert library.get_file_info('g.txt')['size'] == 7
+
+
+def test_get_file_info_after_upload(ftpServer, library, tmp_path):
+    server = ftpServer()
+    writeRemote(server, 'f.txt')
+    (tmp_path / 'f.txt').write_text('longer content')
+    connect(library, server)
+    assert library.get_file_info('f.txt')['size'] == 7
+    library.upload_file(str(tmp_path / 'f.txt'))
+    assert library.get_file_info('f.txt')['size'] == 14
+
+
+def test_get_file_info_in_subdirectory_after_mkd_and_rmd(ftpServer, library):
+    server = ftpServer()
+    connect(library, server)
+    assert library.get_file_info('sub') is None
+    library.mkd('sub')
+    assert library.get_file_info('sub')['type'] == 'dir'
+    assert library.get_file_info('sub/f.txt') is None
+    library.rmd('sub')
+    assert library.get_file_info('sub') is None
@@ -0,0 +1,110 @@
+import pytest
+
+import FtpLibrary as ftpLibraryModule
+from FtpLibrary import FtpLibrary, FtpLibraryError
+from conftest import connect
+
+NAMES = ['file%03d.txt' % i for i in range(30)]
+
+
+class RecordingLogger(object):
+    # replaces robot logger, keeps (level, message) of every message
+    def __init__(self):
+        self.messages = []
+
+    def info(self, message, *args, **kwargs):
+        self.messages.append(('INFO', message))
+
+    def debug(self, message, *args, **kwargs):
+        self.messages.append(('DEBUG', message))
+
+
+@pytest.fixture
+def messages(monkeypatch):
+    recorder = RecordingLogger()
+    monkeypatch.setattr(ftpLibraryModule, 'logger', recorder)
+    return recorder.messages
+
+
+@pytest.fixture
+def server(ftpServer):
+    server = ftpServer()
+    for name in NAMES:
+        open(server.path(name), 'w').close()
+    return server
+
+
+@pytest.fixture
+def loggingLibrary():
+    library = FtpLibrary()
+    yield library
+    library.ftp_close()
+
+
+def test_full(server, loggingLibrary, messages):
+    connect(loggingLibrary, server)
+    del messages[:]
+    lines = loggingLibrary.dir()
+    assert messages == [('INFO', "\n".join(lines))]
+
+
+def test_truncate(server, loggingLibrary, messages):
+    loggingLibrary.set_log_policy('truncate', '5')
+    connect(loggingLibrary, server)
+    del messages[:]
+    lines = loggingLibrary.dir()
+    assert messages == [('INFO', "\n".join(lines[:5]) + "\n... 25 more line(s), 30 in total")]
+    del messages[:]
+    loggingLibrary.pwd()
+    assert messages == [('INFO', '/')]
+
+
+def test_summary(server, loggingLibrary, messages):
+    loggingLibrary.set_log_policy('SUMMARY')
+    connect(loggingLibrary, server)
+    del messages[:]
+    loggingLibrary.dir()
+    helpLines = loggingLibrary.send_cmd('HELP').splitlines()
+    assert messages == [('INFO', '30 line(s)'),
+                        ('INFO', "%s\n... %d more line(s), %d in total" % (helpLines[0], len(helpLines) - 1,
+                                                                           len(helpLines)))]
+
+
+def test_debug(server, loggingLibrary, messages):
+    loggingLibrary.set_log_policy('debug')
+    connect(loggingLibrary, server)
+    lines = loggingLibrary.dir()
+    assert messages[-1] == ('DEBUG', "\n".join(lines))
+    assert all(level == 'DEBUG' for level, message in messages)
+
+
+def test_policy_given_during_import(server, messages):
+    library = FtpLibrary(logPolicy='truncate', logMaxLines=2)
+    connect(library, server)
+    try:
+        del messages[:]
+        library.dir()
+    finally:
+        library.ftp_close()
+    assert messages[0][1].endswith("... 28 more line(s), 30 in total")
+
+
+def test_nothing_is_logged_without_print_output(server, library, messages):
+    connect(library, server)
+    library.dir()
+    assert messages == []
+
+
+def test_invalid_policy(library):
+    with pytest.raises(FtpLibraryError):
+        library.set_log_policy('verbose')
+
+
+def test_dir_to_local_file(server, loggingLibrary, messages, tmp_path):
+    connect(loggingLibrary, server)
+    del messages[:]
+    listingFile = tmp_path / 'listing.txt'
+    assert loggingLibrary.dir(localFile=str(listingFile)) == 30
+    lines = listingFile.read_text().splitlines()
+    assert lines == loggingLibrary.dir()
+    assert messages[0] == ('INFO', "30 line(s) saved to %s" % listingFile)
@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('robotremoteserver')
+
+try:
+    from xmlrpc.client import Binary, ServerProxy
+except ImportError:
+    from xmlrpclib import Binary, ServerProxy
+
+from FtpLibrary import _ConcurrentRemoteServer
+from conftest import PASSWORD, USER
+
+
+@pytest.fixture
+def remoteServer():
+    # returns function starting remote server with given idle timeout
+    servers = []
+
+    def start(idleTimeout=3600):
+        server = _ConcurrentRemoteServer('127.0.0.1', 0, idleTimeout)
+        thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.1})
+        thread.daemon = True
+        thread.start()
+        server.serveThread = thread
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.serveThread.join()
+        server.server_close()
+        for library, lock, lastUsed in server.namespaces.values():
+            for connId in list(library.ftpList):
+                library.ftp_close(connId)
+
+
+def client(remoteServer, path='/'):
+    return ServerProxy('http://127.0.0.1:%d%s' % (remoteServer.server_address[1], path))
+
+
+def runKeyword(proxy, name, *args, **kwargs):
+    result = proxy.run_keyword(name, list(args), kwargs)
+    assert result['status'] == 'PASS', result.get('error')
+    return result.get('return')
+
+
+def ftpConnect(proxy, server):
+    return runKeyword(proxy, 'ftp_connect', server.host, USER, PASSWORD, server.port)
+
+
+def test_keyword_interface(remoteServer):
+    proxy = client(remoteServer())
+    names = proxy.get_keyword_names()
+    assert 'download_file' in names
+    assert 'stop_remote_server' in names
+    assert 'remoteFileName' in proxy.get_keyword_arguments('download_file')
+    assert proxy.get_keyword_documentation('stop_remote_server') == 'Stops the remote server.'
+
+
+def test_clients_have_separate_connections(remoteServer, ftpServer):
+    server = ftpServer()
+    remote = remoteServer()
+    first = client(remote, '/first')
+    second = client(remote, '/second')
+    ftpConnect(first, server)
+    # the same connection id does not clash with connection of other client
+    ftpConnect(second, server)
+    runKeyword(first, 'mkd', 'dir')
+    runKeyword(first, 'cwd', 'dir')
+    assert runKeyword(first, 'pwd') == '/dir'
+    assert runKeyword(second, 'pwd') == '/'
+    assert sorted(remote.namespaces) == ['127.0.0.1/first', '127.0.0.1/second']
+
+
+def test_failure_is_returned(remoteServer):
+    proxy = client(remoteServer())
+    result = proxy.run_keyword('pwd', [], {})
+    assert result['status'] == 'FAIL'
+    assert 'Connection with ID default does not exist' in result['error']
+
+
+def test_binary_arguments_and_transfer_info(remoteServer, ftpServer, tmp_path):
+    server = ftpServer()
+    proxy = client(remoteServer())
+    ftpConnect(proxy, server)
+    runKeyword(proxy, 'upload_bytes', Binary(b'\x00\xffdata'), 'f.bin')
+    with open(server.path('f.bin'), 'rb') as f:
+        assert f.read() == b'\x00\xffdata'
+    info = runKeyword(proxy, 'download_file', 'f.bin', str(tmp_path / 'f.bin'))
+    assert info['path'] == str(tmp_path / 'f.bin')
+    assert info['size'] == 6
+
+
+def test_clients_run_keywords_concurrently(remoteServer, ftpServer):
+    server = ftpServer()
+    remote = remoteServer()
+    slow = client(remote, '/slow')
+    fast = client(remote, '/fast')
+    ftpConnect(slow, server)
+    ftpConnect(fast, server)
+    results = []
+    waiting = threading.Thread(target=lambda: results.append(slow.run_keyword('wait_for_remote_file',
+                                                                              ['missing.txt', '1'], {})))
+    waiting.start()
+    time.sleep(0.2)
+    start = time.time()
+    assert runKeyword(fast, 'pwd') == '/'
+    assert time.time() - start < 0.5
+    waiting.join()
+    assert results[0]['status'] == 'FAIL'
+
+
+def test_idle_clients_are_closed(remoteServer, ftpServer):
+    server = ftpServer()
+    remote = remoteServer(idleTimeout=0.2)
+    idle = client(remote, '/idle')
+    ftpConnect(idle, server)
+    library = remote.namespaces['127.0.0.1/idle'][0]
+    time.sleep(0.3)
+    runKeyword(client(remote, '/other'), 'get_ftp_statistics')
+    assert list(remote.namespaces) == ['127.0.0.1/other']
+    assert library.ftpList == {}
+
+
+def test_stop_remote_server(remoteServer):
+    remote = remoteServer()
+    proxy = client(remote)
+    assert runKeyword(proxy, 'stop_remote_server') is True
+    remote.serveThread.join(5)
+    assert not remote.serveThread.is_alive()
@@ -0,0 +1,95 @@
+import os
+import time
+
+import pytest
+from pyftpdlib.handlers import FTPHandler
+
+from FtpLibrary import FtpLibraryError
+from conftest import connect
+
+CONTENT = os.urandom(200000)
+
+
+def interruptingHandler(failures):
+    # first RETR commands are answered with 426 and connection is closed
+    class InterruptingHandler(FTPHandler):
+        remaining = [failures]
+        logins = []
+
+        def on_login(self, username):
+            self.logins.append(username)
+
+        def interrupted(self):
+            if self.remaining[0]:
+                self.remaining[0] -= 1
+                self.respond("426 Connection closed; transfer aborted.")
+                self.close_when_done()
+                return True
+            return False
+
+        def ftp_RETR(self, file):
+            if not self.interrupted():
+                return FTPHandler.ftp_RETR(self, file)
+
+    return InterruptingHandler
+
+
+class NoSizeHandler(FTPHandler):
+    def ftp_SIZE(self, path):
+        self.respond("502 Command not implemented.")
+
+
+def writeRemote(server):
+    with open(server.path('f.bin'), 'wb') as f:
+        f.write(CONTENT)
+
+
+def test_resumed_download_continues_partial_file(ftpServer, library, tmp_path):
+    server = ftpServer()
+    writeRemote(server)
+    (tmp_path / 'f.bin').write_bytes(CONTENT[:50000])
+    connect(library, server)
+    library.download_file('f.bin', str(tmp_path / 'f.bin'), resume=True)
+    assert (tmp_path / 'f.bin').read_bytes() == CONTENT
+
+
+def test_resumed_download_retries_with_backoff(ftpServer, library, tmp_path):
+    server = ftpServer(interruptingHandler(2))
+    writeRemote(server)
+    library.set_retry_policy(backoff=0.2)
+    connect(library, server)
+    started = time.time()
+    library.download_file('f.bin', str(tmp_path / 'f.bin'), resume=True)
+    # two retries wait at least half of 0.2 and 0.4 s
+    assert time.time() - started >= 0.3
+    assert (tmp_path / 'f.bin').read_bytes() == CONTENT
+    assert len(server.handler.logins) == 3
+
+
+def test_resumed_download_does_not_retry_local_error(ftpServer, library, tmp_path):
+    server = ftpServer(interruptingHandler(0))
+    writeRemote(server)
+    connect(library, server)
+    with pytest.raises(FtpLibraryError):
+        library.download_file('f.bin', str(tmp_path / 'missing' / 'f.bin'), resume=True)
+    assert len(server.handler.logins) == 1
+
+
+def test_resumed_download_without_size_downloads_whole_file(ftpServer, library, tmp_path):
+    server = ftpServer(NoSizeHandler)
+    writeRemote(server)
+    (tmp_path / 'f.bin').write_bytes(b'x' * 1000)
+    connect(library, server)
+    library.download_file('f.bin', str(tmp_path / 'f.bin'), resume=True)
+    assert (tmp_path / 'f.bin').read_bytes() == CONTENT
+
+
+def test_resumed_upload_without_size_uploads_whole_file(ftpServer, library, tmp_path):
+    server = ftpServer(NoSizeHandler)
+    (tmp_path / 'f.bin').write_bytes(CONTENT)
+    with open(server.path('f.bin'), 'wb') as f:
+        f.write(b'x' * 1000)
+    connect(library, server)
+    library.upload_file(str(tmp_path / 'f.bin'), resume=True)
+    with open(server.path('f.bin'), 'rb') as f:
+        assert f.read() == CONTENT
@@ -0,0 +1,94 @@
+import os
+import time
+
+import pytest
+from pyftpdlib.handlers import FTPHandler
+
+from FtpLibrary import FtpLibraryError
+from conftest import connect
+
+
+def flakyHandler(failingFile, refuseLogins):
+    # RETR of failingFile is answered once with 421, optionally refusing later logins
+    class FlakyHandler(FTPHandler):
+        failures = {failingFile: 1}
+        loginsRefused = False
+
+        def ftp_RETR(self, file):
+            name = os.path.basename(file)
+            if self.failures.get(name):
+                self.failures[name] -= 1
+                type(self).loginsRefused = refuseLogins
+                self.respond("421 Service not available, closing control connection.")
+                self.close_when_done()
+                return
+            return FTPHandler.ftp_RETR(self, file)
+
+        def ftp_PASS(self, line):
+            if self.loginsRefused:
+                self.respond("530 Login refused.")
+                return
+            return FTPHandler.ftp_PASS(self, line)
+
+    return FlakyHandler
+
+
+def writeFiles(server, count):
+    os.mkdir(server.path('data'))
+    for i in range(count):
+        with open(server.path('data', 'f%d.bin' % i), 'wb') as f:
+            f.write(b'x' * 1000)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_failed_reconnect_reports_file(ftpServer, library, tmp_path, workers):
+    server = ftpServer(flakyHandler('f3.bin', True))
+    writeFiles(server, 6)
+    library.set_retry_policy(attempts=2, backoff=0)
+    connect(library, server)
+    with pytest.raises(FtpLibraryError) as error:
+        library.download_directory('data', str(tmp_path / 'out'), workers=workers)
+    assert 'f3.bin' in str(error.value)
+    assert 'reconnect failed' in str(error.value)
+
+
+def test_retry_restores_directory_changed_with_send_cmd(ftpServer, library):
+    server = ftpServer(flakyHandler('f0.bin', False))
+    writeFiles(server, 1)
+    library.set_retry_policy(attempts=2, backoff=0)
+    connect(library, server)
+    library.send_cmd('CWD /data')
+    assert library.download_bytes('f0.bin') == b'x' * 1000
+    assert library.pwd() == '/data'
+
+
+def test_parallel_retry_reconnects(ftpServer, library, tmp_path):
+    server = ftpServer(flakyHandler('f2.bin', False))
+    writeFiles(server, 4)
+    library.set_retry_policy(attempts=2, backoff=0)
+    connect(library, server)
+    files = library.download_directory('data', str(tmp_path / 'out'), workers=2)
+    assert len(files) == 4
+    assert all(os.path.getsize(f) == 1000 for f in files)
+
+
+def countingHandler():
+    class CountingHandler(FTPHandler):
+        logins = []
+
+        def on_login(self, username):
+            self.logins.append(username)
+
+    return CountingHandler
+
+
+def test_local_file_error_is_not_retried(ftpServer, library, tmp_path):
+    server = ftpServer(countingHandler())
+    writeFiles(server, 1)
+    library.set_retry_policy(attempts=4, backoff=1)
+    connect(library, server)
+    started = time.time()
+    with pytest.raises(FtpLibraryError):
+        library.download_file('data/f0.bin', str(tmp_path / 'missing' / 'f0.bin'))
+    assert time.time() - started < 0.5
+    assert len(server.handler.logins) == 1
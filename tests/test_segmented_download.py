@@ -0,0 +1,71 @@
+import os
+
+import pytest
+from pyftpdlib.handlers import FTPHandler
+
+from FtpLibrary import FtpLibraryError
+from conftest import connect
+
+MIB = 1024 * 1024
+
+
+def restCounter():
+    # records REST offsets received by server
+    class RestCounter(FTPHandler):
+        offsets = []
+
+        def ftp_REST(self, line):
+            self.offsets.append(int(line))
+            return FTPHandler.ftp_REST(self, line)
+
+    return RestCounter
+
+
+def writeRemote(server, size):
+    content = os.urandom(size)
+    with open(server.path('f.bin'), 'wb') as f:
+        f.write(content)
+    return content
+
+
+def test_segmented_download_of_size_not_divisible_by_segments(ftpServer, library, tmp_path):
+    server = ftpServer(restCounter())
+    content = writeRemote(server, 3 * MIB + 12345)
+    connect(library, server)
+    library.download_file('f.bin', str(tmp_path / 'f.bin'), segments=3)
+    assert (tmp_path / 'f.bin').read_bytes() == content
+    segmentSize = len(content) // 3
+    assert sorted(server.handler.offsets) == [segmentSize, 2 * segmentSize]
+
+
+def test_small_file_is_downloaded_with_fewer_segments(ftpServer, library, tmp_path):
+    server = ftpServer(restCounter())
+    content = writeRemote(server, MIB + 1)
+    connect(library, server)
+    library.download_file('f.bin', str(tmp_path / 'f.bin'), segments=4)
+    assert (tmp_path / 'f.bin').read_bytes() == content
+    assert server.handler.offsets == []
+
+
+def test_segmented_download_replaces_longer_local_file(ftpServer, library, tmp_path):
+    server = ftpServer()
+    content = writeRemote(server, 2 * MIB + 1)
+    (tmp_path / 'f.bin').write_bytes(b'x' * (3 * MIB))
+    connect(library, server)
+    library.download_file('f.bin', str(tmp_path / 'f.bin'), segments=2)
+    assert (tmp_path / 'f.bin').read_bytes() == content
+
+
+def test_segmented_download_cannot_be_resumed(ftpServer, library, tmp_path):
+    server = ftpServer()
+    writeRemote(server, 1000)
+    connect(library, server)
+    with pytest.raises(FtpLibraryError):
+        library.download_file('f.bin', str(tmp_path / 'f.bin'), segments=2, resume=True)
+
+
+def test_segmented_download_of_missing_file(ftpServer, library, tmp_path):
+    server = ftpServer()
+    connect(library, server)
+    with pytest.raises(FtpLibraryError):
+        library.download_file('missing.bin', str(tmp_path / 'f.bin'), segments=2)
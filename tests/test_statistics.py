@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from FtpLibrary import FtpLibraryError
+from conftest import connect
+
+CONTENT = b'x' * 50000
+
+
+def test_statistics_of_transfers(ftpServer, library, tmp_path):
+    server = ftpServer()
+    with open(server.path('f.bin'), 'wb') as f:
+        f.write(CONTENT)
+    connect(library, server)
+    library.download_file('f.bin', str(tmp_path / 'f.bin'))
+    library.upload_file(str(tmp_path / 'f.bin'), 'g.bin')
+    stats = library.get_ftp_statistics('default')
+    assert stats['connections'] == 1
+    assert stats['connectTime'] > 0
+    assert stats['dataConnections'] == 2
+    assert stats['bytesReceived'] == len(CONTENT)
+    assert stats['bytesSent'] == len(CONTENT)
+    assert stats['commands'] > 0
+    assert stats['maxCommandLatency'] >= stats['averageCommandLatency'] > 0
+    assert stats['throughput'] > 0
+
+
+def test_statistics_are_kept_after_close(ftpServer, library):
+    server = ftpServer()
+    connect(library, server, connId='ftp1')
+    library.pwd('ftp1')
+    library.ftp_close('ftp1')
+    connect(library, server, connId='ftp1')
+    stats = library.get_ftp_statistics()
+    assert list(stats) == ['ftp1']
+    assert stats['ftp1']['connections'] == 2
+
+
+def test_statistics_of_workers_are_included(ftpServer, library, tmp_path):
+    server = ftpServer()
+    localDir = tmp_path / 'local'
+    localDir.mkdir()
+    for i in range(6):
+        (localDir / ('%d.txt' % i)).write_bytes(CONTENT)
+    connect(library, server)
+    library.upload_directory(str(localDir), 'remote', workers=3)
+    stats = library.get_ftp_statistics('default')
+    assert stats['connections'] == 4
+    assert stats['bytesSent'] == 6 * len(CONTENT)
+    assert stats['dataConnections'] == 6
+
+
+def test_statistics_of_unknown_connection(library):
+    with pytest.raises(FtpLibraryError):
+        library.get_ftp_statistics('missing')
+
+
+def test_save_statistics(ftpServer, library, tmp_path):
+    server = ftpServer()
+    connect(library, server, connId='ftp1')
+    connect(library, server, connId='ftp2')
+    statisticsFile = tmp_path / 'statistics.json'
+    library.save_ftp_statistics(str(statisticsFile))
+    with open(str(statisticsFile)) as f:
+        stats = json.load(f)
+    assert sorted(stats) == ['ftp1', 'ftp2']
+    assert stats['ftp1']['connections'] == 1
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+
+import pytest
+from pyftpdlib.handlers import FTPHandler
+
+from FtpLibrary import FtpLibraryError
+from conftest import connect
+
+
+class HashingHandler(FTPHandler):
+    # reports sha256 of files with XSHA256 command
+    proto_cmds = dict(FTPHandler.proto_cmds)
+    proto_cmds['XSHA256'] = dict(perm='r', auth=True, arg=True, help='Syntax: XSHA256 <SP> file-name.')
+
+    def ftp_XSHA256(self, path):
+        with open(path, 'rb') as f:
+            self.respond("250 %s" % hashlib.sha256(f.read()).hexdigest())
+
+
+def refusingHandler(*names):
+    # refuses STOR of given file names until refused set is emptied
+    class RefusingHandler(FTPHandler):
+        refused = set(names)
+
+        def ftp_STOR(self, file, mode='w'):
+            if os.path.basename(file) in self.refused:
+                self.respond("553 Refused.")
+                return
+            return FTPHandler.ftp_STOR(self, file, mode)
+
+    return RefusingHandler
+
+
+def readManifest(manifestFile):
+    with open(manifestFile) as f:
+        return json.load(f)
+
+
+def writeFile(path, content, mtime=1700000000):
+    with open(str(path), 'w') as f:
+        f.write(content)
+    os.utime(str(path), (mtime, mtime))
+
+
+def test_upload_manifest_keeps_remote_files_not_deleted(ftpServer, library, tmp_path):
+    server = ftpServer()
+    os.makedirs(server.path('deploy', 'old'))
+    with open(server.path('deploy', 'old', 'remote.txt'), 'w') as f:
+        f.write('remote only')
+    localDir = tmp_path / 'local'
+    localDir.mkdir()
+    (localDir / 'a.txt').write_text('a')
+    manifestFile = str(tmp_path / 'manifest.json')
+    connect(library, server)
+    result = library.sync_directory(str(localDir), 'deploy', manifestFile=manifestFile)
+    assert result['transferred'] == ['a.txt']
+    manifest = readManifest(manifestFile)
+    assert sorted(manifest['files']) == ['a.txt', 'old/remote.txt']
+    assert manifest['dirs'] == ['old']
+    # remote file known only from manifest is deleted in next run
+    result = library.sync_directory(str(localDir), 'deploy', manifestFile=manifestFile, delete=True)
+    assert result['deleted'] == ['old/remote.txt', 'old/']
+    assert os.listdir(server.path('deploy')) == ['a.txt']
+    manifest = readManifest(manifestFile)
+    assert sorted(manifest['files']) == ['a.txt']
+    assert manifest['dirs'] == []
+
+
+def test_upload_renames_moved_file(ftpServer, library, tmp_path):
+    server = ftpServer()
+    localDir = tmp_path / 'local'
+    localDir.mkdir()
+    writeFile(localDir / 'a.txt', 'content')
+    manifestFile = str(tmp_path / 'manifest.json')
+    connect(library, server)
+    library.sync_directory(str(localDir), 'deploy', manifestFile=manifestFile, checksum=True)
+    os.rename(str(localDir / 'a.txt'), str(localDir / 'b.txt'))
+    result = library.sync_directory(str(localDir), 'deploy', manifestFile=manifestFile, checksum=True)
+    assert result['renamed'] == ['a.txt -> b.txt']
+    assert result['transferred'] == []
+    assert os.listdir(server.path('deploy')) == ['b.txt']
+    assert sorted(readManifest(manifestFile)['files']) == ['b.txt']
+
+
+@pytest.mark.parametrize('checksum', [False, True])
+def test_upload_does_not_rename_different_file_of_same_size_and_time(ftpServer, library, tmp_path, checksum):
+    server = ftpServer()
+    localDir = tmp_path / 'local'
+    localDir.mkdir()
+    writeFile(localDir / 'old.cfg', 'AAAA')
+    manifestFile = str(tmp_path / 'manifest.json')
+    connect(library, server)
+    library.sync_directory(str(localDir), 'deploy', manifestFile=manifestFile, checksum=checksum)
+    os.remove(str(localDir / 'old.cfg'))
+    writeFile(localDir / 'new.cfg', 'BBBB')
+    result = library.sync_directory(str(localDir), 'deploy', manifestFile=manifestFile, checksum=checksum)
+    assert result['renamed'] == []
+    assert result['transferred'] == ['new.cfg']
+    with open(server.path('deploy', 'new.cfg')) as f:
+        assert f.read() == 'BBBB'
+
+
+def test_upload_manifest_is_saved_after_failed_transfer(ftpServer, library, tmp_path):
+    server = ftpServer(refusingHandler('c.txt'))
+    localDir = tmp_path / 'local'
+    localDir.mkdir()
+    writeFile(localDir / 'a.txt', 'content')
+    manifestFile = str(tmp_path / 'manifest.json')
+    connect(library, server)
+    library.sync_directory(str(localDir), 'deploy', manifestFile=manifestFile, checksum=True)
+    os.rename(str(localDir / 'a.txt'), str(localDir / 'b.txt'))
+    writeFile(localDir / 'c.txt', 'new file')
+    with pytest.raises(FtpLibraryError):
+        library.sync_directory(str(localDir), 'deploy', manifestFile=manifestFile, checksum=True)
+    assert sorted(readManifest(manifestFile)['files']) == ['b.txt']
+    server.handler.refused.clear()
+    result = library.sync_directory(str(localDir), 'deploy', manifestFile=manifestFile, checksum=True)
+    assert result['renamed'] == []
+    assert result['transferred'] == ['c.txt']
+    assert sorted(os.listdir(server.path('deploy'))) == ['b.txt', 'c.txt']
+
+
+def test_download_renames_moved_file_reported_by_server(ftpServer, library, tmp_path):
+    server = ftpServer(HashingHandler)
+    os.mkdir(server.path('results'))
+    writeFile(server.path('results', 'a.txt'), 'content')
+    localDir = tmp_path / 'local'
+    manifestFile = str(tmp_path / 'manifest.json')
+    connect(library, server)
+    library.sync_directory(str(localDir), 'results', 'download', manifestFile=manifestFile, checksum=True)
+    os.rename(server.path('results', 'a.txt'), server.path('results', 'b.txt'))
+    result = library.sync_directory(str(localDir), 'results', 'download', manifestFile=manifestFile,
+                                    checksum=True)
+    assert result['renamed'] == ['a.txt -> b.txt']
+    assert os.listdir(str(localDir)) == ['b.txt']
+
+
+def test_download_does_not_rename_different_file_of_same_size_and_time(ftpServer, library, tmp_path):
+    server = ftpServer(HashingHandler)
+    os.mkdir(server.path('results'))
+    writeFile(server.path('results', 'old.cfg'), 'AAAA')
+    localDir = tmp_path / 'local'
+    manifestFile = str(tmp_path / 'manifest.json')
+    connect(library, server)
+    library.sync_directory(str(localDir), 'results', 'download', manifestFile=manifestFile, checksum=True)
+    os.remove(server.path('results', 'old.cfg'))
+    writeFile(server.path('results', 'new.cfg'), 'BBBB')
+    result = library.sync_directory(str(localDir), 'results', 'download', manifestFile=manifestFile,
+                                    checksum=True, delete=True)
+    assert result['renamed'] == []
+    assert result['transferred'] == ['new.cfg']
+    assert (localDir / 'new.cfg').read_text() == 'BBBB'
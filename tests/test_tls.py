@@ -0,0 +1,116 @@
+import datetime
+import ipaddress
+import os
+
+import pytest
+
+x509 = pytest.importorskip('cryptography.x509')
+pytest.importorskip('OpenSSL')
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from pyftpdlib.handlers import TLS_FTPHandler
+
+from FtpLibrary import FtpLibrary, FtpLibraryError
+from conftest import connect
+
+
+def createCertificate(path):
+    # writes self-signed certificate valid for 127.0.0.1 followed by its key to path
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, u'127.0.0.1')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key()) \
+        .serial_number(x509.random_serial_number()).not_valid_before(now - datetime.timedelta(days=1)) \
+        .not_valid_after(now + datetime.timedelta(days=1)) \
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address(u'127.0.0.1'))]),
+                       critical=False) \
+        .sign(key, hashes.SHA256())
+    with open(path, 'wb') as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL,
+                                  serialization.NoEncryption()))
+    return path
+
+
+@pytest.fixture(scope='module')
+def certificates(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('certificates')
+    return createCertificate(str(directory / 'server.pem')), createCertificate(str(directory / 'other.pem'))
+
+
+@pytest.fixture
+def tlsServer(ftpServer, certificates):
+    handler = type('TlsHandler', (TLS_FTPHandler,), {'certfile': certificates[0]})
+    return ftpServer(handler)
+
+
+def test_secure_data_connection_reuses_session(tlsServer, library, tmp_path):
+    with open(tlsServer.path('f.txt'), 'w') as f:
+        f.write('content')
+    connect(library, tlsServer, tls=True, secureData=True)
+    conn = library.getAllFtpConnections()['default']
+    assert conn._prot_p
+    dataConn, size = conn.ntransfercmd('RETR f.txt')
+    try:
+        assert dataConn.session_reused
+        assert dataConn.recv(100) == b'content'
+    finally:
+        dataConn.close()
+    conn.voidresp()
+    library.download_file('f.txt', str(tmp_path / 'f.txt'))
+    assert (tmp_path / 'f.txt').read_text() == 'content'
+
+
+def test_worker_connections_use_secure_data(tlsServer, library, tmp_path):
+    localDir = tmp_path / 'local'
+    localDir.mkdir()
+    for i in range(4):
+        (localDir / ('%d.txt' % i)).write_text('content %d' % i)
+    connect(library, tlsServer, tls=True, secureData=True)
+    library.upload_directory(str(localDir), 'remote', workers=2)
+    assert sorted(os.listdir(tlsServer.path('remote'))) == ['0.txt', '1.txt', '2.txt', '3.txt']
+    files = library.download_directory('remote', str(tmp_path / 'copy'), workers=2)
+    assert len(files) == 4
+    assert (tmp_path / 'copy' / '3.txt').read_text() == 'content 3'
+
+
+def test_connections_share_ssl_context(tlsServer, library):
+    connect(library, tlsServer, 'ftp1', tls=True, tlsVersion='1.2')
+    connect(library, tlsServer, 'ftp2', tls=True, tlsVersion='1.2')
+    connect(library, tlsServer, 'ftp3', tls=True)
+    connections = library.getAllFtpConnections()
+    assert connections['ftp1'].context is connections['ftp2'].context
+    assert connections['ftp1'].context is not connections['ftp3'].context
+
+
+def test_server_certificate_is_verified(tlsServer, library, certificates):
+    connect(library, tlsServer, 'ftp1', tls=True, caFile=certificates[0])
+    assert library.pwd('ftp1')
+    with pytest.raises(FtpLibraryError):
+        connect(library, tlsServer, 'ftp2', tls=True, caFile=certificates[1])
+
+
+def test_invalid_settings(tlsServer, library, tmp_path):
+    with pytest.raises(FtpLibraryError) as error:
+        connect(library, tlsServer, tls=True, tlsVersion='2.0')
+    assert 'TLS version should be one of' in str(error.value)
+    with pytest.raises(FtpLibraryError) as error:
+        connect(library, tlsServer, tls=True, caFile=str(tmp_path / 'missing.pem'))
+    assert 'Cannot create SSL context' in str(error.value)
+
+
+def test_pooled_connection_with_secure_data(tlsServer, tmp_path):
+    with open(tlsServer.path('f.txt'), 'w') as f:
+        f.write('content')
+    library = FtpLibrary(printOutput=False, connectionPool=True)
+    try:
+        connect(library, tlsServer, tls=True)
+        library.ftp_close()
+        connect(library, tlsServer, tls=True, secureData=True)
+        assert library.getAllFtpConnections()['default']._prot_p
+        library.download_file('f.txt', str(tmp_path / 'f.txt'))
+    finally:
+        library._close()
+    assert (tmp_path / 'f.txt').read_text() == 'content'
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+from pyftpdlib.handlers import FTPHandler
+
+from FtpLibrary import FtpLibraryError
+from conftest import connect
+
+CONTENT = os.urandom(300000)
+
+
+class RefusingPortHandler(FTPHandler):
+    def ftp_PORT(self, line):
+        self.respond("501 Rejected data connection to foreign address.")
+
+
+class PermissiveHandler(FTPHandler):
+    permit_foreign_addresses = True
+
+
+def servers(ftpServer, sourceHandler, targetHandler, targetHost='127.0.0.1'):
+    # with target on 127.0.0.2 its data connection to source comes from foreign
+    # address, which pyftpdlib source rejects with unsolicited 425 reply
+    source = ftpServer(sourceHandler, 'source')
+    target = ftpServer(targetHandler, 'target', targetHost)
+    with open(source.path('f.bin'), 'wb') as f:
+        f.write(CONTENT)
+    return source, target
+
+
+def connectBoth(library, source, target):
+    connect(library, source, 'source')
+    connect(library, target, 'target')
+
+
+def targetContent(target, name='g.bin'):
+    with open(target.path(name), 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('mode', ['fxp', 'pipe', 'auto'])
+def test_transfer(ftpServer, library, mode):
+    source, target = servers(ftpServer, FTPHandler, FTPHandler)
+    connectBoth(library, source, target)
+    outputMsg = library.transfer_between_connections('f.bin', 'g.bin', 'source', 'target', mode)
+    assert outputMsg.startswith('226')
+    assert targetContent(target) == CONTENT
+
+
+def test_target_refusing_port_falls_back_to_pipe(ftpServer, library):
+    source, target = servers(ftpServer, FTPHandler, RefusingPortHandler)
+    connectBoth(library, source, target)
+    library.transfer_between_connections('f.bin', 'g.bin', 'source', 'target')
+    assert targetContent(target) == CONTENT
+
+
+def test_source_rejecting_data_connection_falls_back_to_pipe(ftpServer, library):
+    source, target = servers(ftpServer, FTPHandler, PermissiveHandler, '127.0.0.2')
+    connectBoth(library, source, target)
+    library.transfer_between_connections('f.bin', 'g.bin', 'source', 'target')
+    assert targetContent(target) == CONTENT
+    # both control channels are in sync afterwards
+    assert library.pwd('source') == '/'
+    assert library.pwd('target') == '/'
+    library.transfer_between_connections('f.bin', 'h.bin', 'source', 'target', 'pipe')
+    assert targetContent(target, 'h.bin') == CONTENT
+
+
+def test_source_rejecting_data_connection_fails_in_fxp_mode(ftpServer, library):
+    source, target = servers(ftpServer, FTPHandler, PermissiveHandler, '127.0.0.2')
+    connectBoth(library, source, target)
+    with pytest.raises(FtpLibraryError) as error:
+        library.transfer_between_connections('f.bin', 'g.bin', 'source', 'target', 'fxp')
+    assert str(error.value).startswith('425')
+    assert not os.path.exists(target.path('g.bin'))
+    assert library.pwd('source') == '/'
+    assert library.pwd('target') == '/'
+
+
+def test_missing_source_file(ftpServer, library):
+    source, target = servers(ftpServer, FTPHandler, FTPHandler)
+    connectBoth(library, source, target)
+    with pytest.raises(FtpLibraryError):
+        library.transfer_between_connections('missing.bin', 'g.bin', 'source', 'target')
+    assert library.pwd('target') == '/'
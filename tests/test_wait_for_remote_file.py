@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+from pyftpdlib.handlers import FTPHandler
+
+from FtpLibrary import FtpLibraryError
+from conftest import connect
+
+
+class CountingHandler(FTPHandler):
+    # counts SIZE commands of all connections
+    sizeCommands = []
+
+    def ftp_SIZE(self, path):
+        self.sizeCommands.append(path)
+        return FTPHandler.ftp_SIZE(self, path)
+
+
+def later(delay, function, *args):
+    timer = threading.Timer(delay, function, args)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+def writeRemote(path, content, mode='w'):
+    with open(path, mode) as f:
+        f.write(content)
+
+
+def test_existing_file(ftpServer, library):
+    server = ftpServer()
+    writeRemote(server.path('f.txt'), 'content')
+    connect(library, server)
+    assert library.wait_for_remote_file('f.txt', timeout=1) == 7
+
+
+def test_file_appears(ftpServer, library):
+    server = ftpServer()
+    connect(library, server)
+    later(0.5, writeRemote, server.path('f.txt'), 'content')
+    start = time.time()
+    assert library.wait_for_remote_file('f.txt', timeout=5) == 7
+    assert time.time() - start >= 0.5
+
+
+def test_timeout(ftpServer, library):
+    server = ftpServer()
+    writeRemote(server.path('f.txt'), 'abc')
+    connect(library, server)
+    start = time.time()
+    with pytest.raises(FtpLibraryError) as error:
+        library.wait_for_remote_file('missing.txt', timeout=0.5)
+    assert 'missing.txt not ready within 0.5 seconds (last size: None)' in str(error.value)
+    with pytest.raises(FtpLibraryError) as error:
+        library.wait_for_remote_file('f.txt', timeout=0.5, minSize=10)
+    assert '(last size: 3)' in str(error.value)
+    assert time.time() - start < 3
+
+
+def test_min_size(ftpServer, library):
+    server = ftpServer()
+    writeRemote(server.path('f.txt'), 'abc')
+    connect(library, server)
+    later(0.5, writeRemote, server.path('f.txt'), 'defghij', 'a')
+    assert library.wait_for_remote_file('f.txt', timeout=5, minSize='10') == 10
+
+
+def test_stable_time(ftpServer, library):
+    server = ftpServer()
+    writeRemote(server.path('f.txt'), 'a')
+    connect(library, server)
+    for i in range(1, 4):
+        later(0.3 * i, writeRemote, server.path('f.txt'), 'b', 'a')
+    start = time.time()
+    assert library.wait_for_remote_file('f.txt', timeout=10, stableTime='1') == 4
+    # last write at 0.9 s, file must not change for 1 s after it
+    assert time.time() - start >= 1.9
+
+
+def test_checks_become_rarer(ftpServer, library):
+    server = ftpServer(CountingHandler)
+    connect(library, server)
+    with pytest.raises(FtpLibraryError):
+        library.wait_for_remote_file('missing.txt', timeout=3, maxInterval=1)
+    # 0.2 s interval would mean 15 checks
+    assert 4 <= len(server.handler.sizeCommands) <= 8